@@ -1,99 +1,409 @@
 import os
+import csv
+import time
+import sqlite3
+import argparse
 import pandas as pd
-import PyPDF2
-import docx2txt
-import tkinter as tk
-from tkinter import filedialog
-from scorer import score_resume
-from rag_agent import analyze_resume_with_rag as generate_feedback
-from fpdf import FPDF
-
-# === Helper to extract text ===
-def extract_text(file_path):
-    try:
-        if file_path.endswith(".pdf"):
-            with open(file_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                return "\n".join(page.extract_text() for page in reader.pages if page.extract_text())
-        elif file_path.endswith(".docx"):
-            return docx2txt.process(file_path)
-        elif file_path.endswith(".txt"):
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-    except Exception as e:
-        print(f"❌ Error reading {file_path}: {e}")
-    return ""
-
-# === Helper to save feedback to PDF ===
-def save_feedback_pdf(resume_name, feedback_text):
-    try:
-        os.makedirs("pdf_feedback", exist_ok=True)
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-
-        pdf.multi_cell(0, 10, f"Resume Feedback for: {resume_name}\n\n")
-        pdf.multi_cell(0, 10, feedback_text)
-
-        output_path = os.path.join("pdf_feedback", f"{resume_name}_feedback.pdf")
-        pdf.output(output_path)
-        print(f"✅ PDF saved: {output_path}")
-    except Exception as e:
-        print(f"❌ Error saving PDF for {resume_name}: {e}")
+from scorer import score_resumes, shortlist_indices
+from dedup import DEDUP_THRESHOLD, find_duplicate_clusters
+from text_extractor import IMAGE_EXTENSIONS, TEXT_EXTENSIONS, extract_text, iter_extracted
+from rag_agent import RAGAgentError, analyze_resumes_with_rag
+from ollama_client import DEFAULT_CONCURRENCY
+from llm_cache import llm_cache_stats
+from metrics import enable as enable_metrics, metrics, span
+from results_store import ResultWriter, external_sort_csv
+from report_renderer import REPORT_MODES, unique_report_names, write_reports
+from work_queue import LEASE_SECONDS, LEASE_SIZE, MAX_ATTEMPTS, RETRY_SECONDS, WorkQueue, worker_id
+
+DEFAULT_QUERY = "How can this resume be improved to better match the JD?"
+
+# === Parallel Ingestion Stage ===
+def list_resume_files(resume_folder, ocr=False):
+    extensions = TEXT_EXTENSIONS + IMAGE_EXTENSIONS if ocr else TEXT_EXTENSIONS
+    return sorted(f for f in os.listdir(resume_folder) if f.lower().endswith(extensions))
+
+def ingest_resumes(resume_folder, ocr=False, workers=None):
+    filenames = list_resume_files(resume_folder, ocr=ocr)
+    file_paths = [os.path.join(resume_folder, f) for f in filenames]
+
+    start = time.perf_counter()
+    texts = [None] * len(filenames)
+    for done, (index, file_path, text, error) in enumerate(iter_extracted(file_paths, ocr=ocr, workers=workers), start=1):
+        if error:
+            print(f"❌ Error reading {file_path}: {error}")
+        texts[index] = text
+        print(f"📄 Extracted {done}/{len(filenames)}: {filenames[index]}")
+    elapsed = time.perf_counter() - start
+
+    if filenames:
+        print(f"⏱️ Extracted {len(filenames)} files in {elapsed:.1f}s ({len(filenames) / max(elapsed, 1e-9):.1f} files/sec)")
+
+    # Keep directory order deterministic regardless of completion order
+    kept = [(f, t) for f, t in zip(filenames, texts) if t]
+    if len(kept) < len(filenames):
+        print(f"❌ Skipped {len(filenames) - len(kept)} of {len(filenames)} files with no extractable text")
+    return [f for f, _ in kept], [t for _, t in kept]
+
+RESULT_COLUMNS = ["Resume File", "Match Score", "Matched Skills", "Duplicate Cluster", "Stage", "Feedback"]
+OUTPUT_BASE = "batch_ranking_results"
+
+# === Feedback Reports (rendered once the ranking is final) ===
+def write_batch_reports(output_path, report_names, mode="pdf", workers=None):
+    # Rows stream from the ranked CSV straight into the renderer, so the feedback isn't all held in memory
+    reports = 0
+
+    def entries():
+        nonlocal reports
+        with open(output_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row["Stage"] == "feedback":
+                    reports += 1
+                    yield {
+                        "name": report_names.get(row["Resume File"], row["Resume File"]),
+                        "score": float(row["Match Score"]),
+                        "feedback": row["Feedback"],
+                    }
+
+    start = time.perf_counter()
+    with span("batch.reports"):
+        written = write_reports(entries(), mode=mode, workers=workers)
+    if written:
+        print(f"📄 Rendered {reports} feedback reports into {len(written)} file(s) in {time.perf_counter() - start:.1f}s")
+    return written
 
 # === Load and Rank Resumes ===
-def process_batch(resume_folder, jd_file_path):
-    jd_text = extract_text(jd_file_path)
+def process_batch(resume_folder, jd_file_path, query=DEFAULT_QUERY, ocr=False, workers=None, concurrency=DEFAULT_CONCURRENCY,
+                  use_llm_cache=True, top_k=None, min_score=None, budget_seconds=None, resume=False, output_base=OUTPUT_BASE,
+                  report_mode="pdf", dedup_threshold=DEDUP_THRESHOLD):
+    start = time.perf_counter()
+    metrics.reset()  # the metrics summary covers this run only
+    with span("batch.jd"):
+        jd_text = extract_text(jd_file_path, ocr=ocr)
     if not jd_text:
         raise ValueError("Job description could not be extracted.")
 
-    all_results = []
+    with span("batch.ingest"):
+        filenames, resume_texts = ingest_resumes(resume_folder, ocr=ocr, workers=workers)
 
-    for filename in os.listdir(resume_folder):
-        filepath = os.path.join(resume_folder, filename)
-        if not filename.lower().endswith((".pdf", ".docx", ".txt")):
-            continue
+    # Near-duplicates (re-applications, the same CV under another filename) are scored and
+    # reviewed once per cluster; every member gets the representative's results
+    if dedup_threshold:
+        with span("batch.dedup"):
+            representatives = find_duplicate_clusters(resume_texts, threshold=dedup_threshold)
+    else:
+        representatives = list(range(len(resume_texts)))
+    unique = sorted(set(representatives))
+    rep_pos = {r: k for k, r in enumerate(unique)}
+    members = {r: [] for r in unique}
+    for i, r in enumerate(representatives):
+        members[r].append(i)
+    clusters = sum(1 for r in unique if len(members[r]) > 1)
+    if clusters:
+        print(f"🧬 Folded {len(filenames) - len(unique)} near-duplicate resumes into {clusters} clusters")
+
+    # Score the whole batch in one pass against a shared vocabulary
+    with span("batch.score"):
+        unique_scores, unique_skills = score_resumes([resume_texts[r] for r in unique], jd_text)
+        scores = unique_scores[[rep_pos[r] for r in representatives]]
+        matched_skills = [unique_skills[rep_pos[r]] for r in representatives]
+
+    # Rows stream to disk as each resume finishes; --resume skips those already checkpointed
+    with ResultWriter(output_base, RESULT_COLUMNS, resume=resume) as writer:
+        if resume and writer.completed:
+            print(f"⏩ Resuming: {len(writer.completed)} resumes already finished")
+
+        def write_row(i, stage, feedback="", checkpoint=True):
+            writer.write({
+                "Resume File": filenames[i],
+                "Match Score": float(scores[i]),
+                "Matched Skills": ", ".join(matched_skills[i]),
+                "Duplicate Cluster": filenames[representatives[i]] if len(members[representatives[i]]) > 1 else "",
+                "Stage": stage,
+                "Feedback": feedback
+            }, checkpoint=checkpoint)
+
+        # Stage two: only the shortlist (top-K and/or above min_score) gets LLM feedback;
+        # top-K counts clusters, so duplicates don't crowd distinct candidates out
+        shortlist = [unique[k] for k in shortlist_indices(unique_scores, top_k=top_k, min_score=min_score)]
+        shortlisted = set(shortlist)
+        for i in range(len(filenames)):
+            if representatives[i] not in shortlisted and not writer.is_done(filenames[i]):
+                write_row(i, "score-only")
+
+        pending = [r for r in shortlist if not all(writer.is_done(filenames[i]) for i in members[r])]
+        print(f"🎯 Generating feedback for {len(pending)} of {len(unique)} distinct resumes")
+
+        failed = []
+
+        def on_feedback(j, feedback):
+            if isinstance(feedback, RAGAgentError):
+                failed.append(j)
+            for i in members[pending[j]]:
+                if writer.is_done(filenames[i]):
+                    continue
+                if feedback is None:
+                    write_row(i, "budget-exhausted")
+                elif isinstance(feedback, RAGAgentError):
+                    # Left out of the checkpoint so --resume retries it; no report is rendered for it
+                    write_row(i, "error", str(feedback), checkpoint=False)
+                else:
+                    write_row(i, "feedback", feedback)
+
+        with span("batch.feedback"):
+            analyze_resumes_with_rag(
+                [resume_texts[i] for i in pending], query,
+                concurrency=concurrency, use_cache=use_llm_cache, budget_seconds=budget_seconds, on_result=on_feedback,
+            )
+        partial_path = writer.partial_path
+    if failed:
+        print(f"❌ Feedback failed for {len(failed)} resumes; run again with --resume to retry them")
 
-        resume_text = extract_text(filepath)
-        if not resume_text:
+    # Final ranking via an on-disk merge sort rather than loading every row
+    with span("batch.sort"):
+        output_path = external_sort_csv(partial_path, output_base + ".csv", "Match Score", descending=True)
+    report_names = dict(zip(filenames, unique_report_names([os.path.splitext(f)[0] for f in filenames])))
+    write_batch_reports(output_path, report_names, mode=report_mode, workers=workers)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Batch processing completed. Saved to {output_path}")
+    print(f"⏱️ Processed {len(filenames)} resumes in {elapsed:.1f}s ({len(filenames) / max(elapsed, 1e-9):.2f} files/sec)")
+    cache_stats = llm_cache_stats()
+    print(f"🧠 LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, ~{cache_stats['saved_seconds']:.1f}s of generation saved")
+    if metrics.enabled:
+        metrics.observe("batch.total", elapsed)
+        json_path, prom_path = metrics.write(
+            output_base, resumes=len(filenames), distinct=len(unique), feedback=len(pending), seconds=elapsed, ocr=ocr, output=output_path,
+        )
+        print(f"📊 Stage metrics saved to {json_path} and {prom_path}")
+    print(pd.read_csv(output_path, nrows=5))
+    return output_path
+
+# === Queue-backed Batch (any number of workers sharing one SQLite job table) ===
+# enqueue_batch() records the JD and resume paths, run_queue_worker() processes leased
+# chunks until the queue drains, and merge_queue_results() writes the ranked CSV. Workers on
+# other machines need the queue and the resumes on a shared filesystem; extracted texts travel
+# through the queue, and each host keeps its own cache directory (the LLM cache's WAL journal
+# doesn't work across machines).
+def enqueue_batch(queue_path, resume_folder, jd_file_path, query=DEFAULT_QUERY, ocr=False, top_k=None, min_score=None,
+                  dedup_threshold=DEDUP_THRESHOLD):
+    jd_text = extract_text(jd_file_path, ocr=ocr)
+    if not jd_text:
+        raise ValueError("Job description could not be extracted.")
+    filenames = list_resume_files(resume_folder, ocr=ocr)
+    queue = WorkQueue(queue_path)
+    queue.configure(jd_text=jd_text, query=query, ocr=ocr, top_k=top_k, min_score=min_score, dedup_threshold=dedup_threshold)
+    added = queue.enqueue([os.path.abspath(os.path.join(resume_folder, f)) for f in filenames])
+    print(f"📥 Queued {added} new resumes ({len(filenames)} in folder) in {queue_path}")
+    queue.close()
+    return added
+
+def _extract_leased(queue, owner, jobs, ocr, workers):
+    # Stores each leased resume's text for the shared scoring pass; unreadable ones fail for good
+    extracted = 0
+    for index, file_path, text, error in iter_extracted([path for _, path, _ in jobs], ocr=ocr, workers=workers):
+        if text:
+            extracted += queue.complete_extract(owner, jobs[index][0], text)
+        else:
+            print(f"❌ Error reading {file_path}: {error or 'no text extracted'}")
+            queue.fail(owner, jobs[index][0], error or "no text extracted")
+    return extracted
+
+def run_queue_worker(queue_path, workers=1, concurrency=DEFAULT_CONCURRENCY, use_llm_cache=True, lease_size=LEASE_SIZE,
+                     lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, poll_seconds=0.5, metrics_base=None):
+    # With metrics_base set, each worker writes <metrics_base>.<host>-<pid>.metrics.json / .prom
+    queue = WorkQueue(queue_path)
+    settings = queue.settings()
+    if "jd_text" not in settings:
+        raise ValueError(f"No batch has been queued in {queue_path}.")
+
+    if metrics_base:
+        enable_metrics()  # spawned worker processes don't inherit the parent's setting
+    metrics.reset()
+    owner = worker_id()
+    start = time.perf_counter()
+    extracted = reviewed = 0
+    while True:
+        try:
+            with span("queue.lease"):
+                state, jobs = queue.lease(owner, limit=lease_size, lease_seconds=lease_seconds, max_attempts=max_attempts)
+        except sqlite3.OperationalError as e:
+            # "database is locked" after the busy timeout (slow shared filesystem); just try again
+            print(f"❌ {owner} could not lease jobs: {e}")
+            time.sleep(poll_seconds)
+            continue
+        if not jobs:
+            if queue.finished():
+                break
+            # Other workers hold the remaining leases; wait in case one of them dies
+            time.sleep(poll_seconds)
             continue
 
-        score, matched_skills = score_resume(resume_text, jd_text)
-        feedback = generate_feedback(resume_text, jd_text, query="How can this resume be improved to better match the JD?")
+        try:
+            if state == "extract":
+                with span("queue.extract"):
+                    done = _extract_leased(queue, owner, jobs, settings["ocr"], workers)
+                extracted += done
+                print(f"📄 {owner} extracted {done} resumes")
+            else:
+                failed = []
 
-        all_results.append({
-            "Resume File": filename,
-            "Match Score": score,
-            "Matched Skills": ", ".join(matched_skills),
-            "Feedback": feedback
-        })
+                def on_feedback(j, feedback):
+                    if isinstance(feedback, RAGAgentError):
+                        # Back to the queue after a pause (Ollama may be down); it fails for good after max_attempts
+                        failed.append(j)
+                        queue.release(owner, [jobs[j][0]], feedback, retry_after=RETRY_SECONDS)
+                    else:
+                        queue.complete_feedback(owner, jobs[j][0], feedback)
+                    queue.renew(owner, lease_seconds)
 
-        save_feedback_pdf(filename.split('.')[0], feedback)
+                with span("queue.feedback"):
+                    analyze_resumes_with_rag(
+                        [text for _, _, text in jobs], settings["query"],
+                        concurrency=concurrency, use_cache=use_llm_cache, on_result=on_feedback,
+                    )
+                reviewed += len(jobs) - len(failed)
+                print(f"🎯 {owner} generated feedback for {len(jobs) - len(failed)} resumes")
+                if failed:
+                    print(f"❌ {owner} released {len(failed)} resumes whose feedback failed; retrying in {RETRY_SECONDS:g}s")
+        except Exception as e:
+            print(f"❌ {owner} released {len(jobs)} jobs after an error: {e}")
+            try:
+                queue.release(owner, [job_id for job_id, _, _ in jobs], e)
+            except sqlite3.OperationalError:
+                pass  # the leases expire on their own
 
-    df = pd.DataFrame(all_results)
-    df.to_csv("batch_ranking_results.csv", index=False)
-    print("✅ Batch processing completed. Saved to batch_ranking_results.csv")
-    print(df.head())
-    return df
+    elapsed = time.perf_counter() - start
+    print(f"✅ Worker {owner} finished: {extracted} extracted, {reviewed} reviewed in {elapsed:.1f}s")
+    queue.close()
+    if metrics.enabled:
+        metrics.observe("queue.worker", elapsed)
+        json_path, prom_path = metrics.write(
+            f"{metrics_base or queue_path}.{owner.replace(':', '-')}", worker=owner, extracted=extracted, reviewed=reviewed, seconds=elapsed,
+        )
+        print(f"📊 Worker metrics saved to {json_path} and {prom_path}")
+    return extracted, reviewed
 
-# === Main (Dynamic File Dialogs) ===
-if __name__ == '__main__':
-    root = tk.Tk()
-    root.withdraw()
+def run_queue_workers(queue_path, processes, **worker_options):
+    # Convenience for one machine: N worker processes on the same queue
+    import multiprocessing
+
+    context = multiprocessing.get_context("spawn")
+    procs = [context.Process(target=run_queue_worker, args=(queue_path,), kwargs=worker_options) for _ in range(processes)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+def merge_queue_results(queue_path, output_base=OUTPUT_BASE, report_mode="pdf", workers=None):
+    start = time.perf_counter()
+    metrics.reset()
+    queue = WorkQueue(queue_path)
+    if not queue.finished():
+        raise ValueError(f"Queue still has unfinished jobs: {queue.counts()}")
+    for path, error in queue.failures():
+        print(f"❌ Failed {path}: {error}")
 
-    print("📂 Select Resume Folder")
-    resume_folder = filedialog.askdirectory(title="Select Folder with Resumes")
+    results = queue.results()
+    queue.close()
+    filenames = [os.path.basename(path) for path, *_ in results]
+    with ResultWriter(output_base, RESULT_COLUMNS) as writer:
+        for filename, (_, score, matched_skills, stage, feedback, cluster) in zip(filenames, results):
+            writer.write({
+                "Resume File": filename,
+                "Match Score": score,
+                "Matched Skills": ", ".join(matched_skills),
+                "Duplicate Cluster": os.path.basename(cluster) if cluster else "",
+                "Stage": stage,
+                "Feedback": feedback
+            })
+        partial_path = writer.partial_path
 
-    print("📄 Select Job Description File")
-    jd_file_path = filedialog.askopenfilename(title="Select JD File", filetypes=[("PDF, DOCX, TXT", "*.pdf *.docx *.txt")])
+    with span("batch.sort"):
+        output_path = external_sort_csv(partial_path, output_base + ".csv", "Match Score", descending=True)
+    report_names = dict(zip(filenames, unique_report_names([os.path.splitext(f)[0] for f in filenames])))
+    write_batch_reports(output_path, report_names, mode=report_mode, workers=workers)
+    print(f"✅ Merged {len(results)} queued results. Saved to {output_path}")
+    if metrics.enabled:
+        elapsed = time.perf_counter() - start
+        metrics.observe("queue.merge", elapsed)
+        json_path, prom_path = metrics.write(output_base, resumes=len(results), seconds=elapsed, queue=queue_path, output=output_path)
+        print(f"📊 Merge metrics saved to {json_path} and {prom_path}")
+    return output_path
+
+# === Main (CLI, falling back to file dialogs) ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rank a folder of resumes against a job description")
+    parser.add_argument("resume_folder", nargs="?", help="Folder with resumes (prompted for if omitted)")
+    parser.add_argument("jd_file", nargs="?", help="Job description file (prompted for if omitted)")
+    parser.add_argument("--resume", action="store_true", help="Skip resumes already finished by an interrupted run")
+    parser.add_argument("--top-k", type=int, default=None, help="Only generate feedback for the K best-scoring resumes")
+    parser.add_argument("--min-score", type=float, default=None, help="Only generate feedback at or above this score")
+    parser.add_argument("--budget-seconds", type=float, default=None, help="Stop starting new feedback after this long")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Concurrent Ollama requests")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Always regenerate feedback")
+    parser.add_argument("--output", default=OUTPUT_BASE, help="Output path without extension")
+    parser.add_argument("--metrics", action="store_true", help="Record per-stage timings and counters to <output>.metrics.json / <output>.prom (with --work: <output>.<host>-<pid>.*, one per worker)")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD, help="Fold resumes at or above this MinHash similarity into one (0 disables)")
+    parser.add_argument("--report", choices=REPORT_MODES, default="pdf", help="Feedback PDFs: one per resume, one combined report, a zip, or none")
+    queue_mode = parser.add_mutually_exclusive_group()
+    queue_mode.add_argument("--enqueue", metavar="QUEUE", help="Only queue the resumes and JD into this SQLite work queue")
+    queue_mode.add_argument("--work", metavar="QUEUE", help="Process jobs from this work queue until it drains")
+    queue_mode.add_argument("--merge", metavar="QUEUE", help="Write the ranked CSV and reports from a drained work queue")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start with --work")
+    parser.add_argument("--lease-size", type=int, default=LEASE_SIZE, help="Jobs leased per round with --work")
+    parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS, help="Lease timeout before a job is retried elsewhere")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="Leases per job before it is marked failed")
+    args = parser.parse_args()
+    if args.metrics:
+        enable_metrics()
 
-    if resume_folder and jd_file_path:
+    if args.work or args.merge:
         try:
-            process_batch(resume_folder, jd_file_path)
+            if args.work:
+                worker_options = dict(
+                    workers=args.workers or 1, concurrency=args.concurrency, use_llm_cache=not args.no_llm_cache,
+                    lease_size=args.lease_size, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts,
+                    metrics_base=args.output if args.metrics else None,
+                )
+                if args.processes > 1:
+                    run_queue_workers(args.work, args.processes, **worker_options)
+                else:
+                    run_queue_worker(args.work, **worker_options)
+            else:
+                merge_queue_results(args.merge, output_base=args.output, report_mode=args.report, workers=args.workers)
         except Exception as e:
             print("❌ Error:", e)
     else:
-        print("❌ Operation cancelled. No files selected.")
+        resume_folder, jd_file_path = args.resume_folder, args.jd_file
+        if not (resume_folder and jd_file_path):
+            import tkinter as tk
+            from tkinter import filedialog
+
+            root = tk.Tk()
+            root.withdraw()
+
+            print("📂 Select Resume Folder")
+            resume_folder = resume_folder or filedialog.askdirectory(title="Select Folder with Resumes")
+
+            print("📄 Select Job Description File")
+            jd_file_path = jd_file_path or filedialog.askopenfilename(title="Select JD File", filetypes=[("PDF, DOCX, TXT", "*.pdf *.docx *.txt")])
+
+        if resume_folder and jd_file_path:
+            try:
+                if args.enqueue:
+                    enqueue_batch(args.enqueue, resume_folder, jd_file_path, top_k=args.top_k, min_score=args.min_score,
+                                  dedup_threshold=args.dedup_threshold)
+                else:
+                    process_batch(
+                        resume_folder, jd_file_path, workers=args.workers, concurrency=args.concurrency,
+                        use_llm_cache=not args.no_llm_cache, top_k=args.top_k, min_score=args.min_score,
+                        budget_seconds=args.budget_seconds, resume=args.resume, output_base=args.output,
+                        report_mode=args.report, dedup_threshold=args.dedup_threshold,
+                    )
+            except Exception as e:
+                print("❌ Error:", e)
+        else:
+            print("❌ Operation cancelled. No files selected.")
     # === Persona-Tailored Query Generator ===
 def generate_persona_prompt(role):
     return f"""
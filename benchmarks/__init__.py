@@ -0,0 +1 @@
+# === Benchmarks: synthetic corpus generator (corpus.py) and timing runner (run.py) ===
@@ -0,0 +1,163 @@
+import os
+import json
+import random
+import zipfile
+import argparse
+from xml.sax.saxutils import escape
+from fpdf import FPDF
+
+FORMATS = ("pdf", "docx", "txt")
+RESUME_DIR = "resumes"
+JD_DIR = "jds"
+MANIFEST_FILE = "corpus.json"
+
+# === Vocabulary for synthetic documents ===
+ROLES = {
+    "Data Scientist": ["python", "pandas", "scikit-learn", "sql", "statistics", "machine learning", "tensorflow", "a/b testing"],
+    "Backend Engineer": ["python", "django", "rest apis", "postgresql", "docker", "kubernetes", "redis", "ci/cd"],
+    "Frontend Engineer": ["javascript", "typescript", "react", "css", "html", "webpack", "accessibility", "jest"],
+    "DevOps Engineer": ["aws", "terraform", "kubernetes", "docker", "linux", "prometheus", "bash", "ci/cd"],
+    "Product Manager": ["roadmapping", "stakeholder management", "agile", "jira", "user research", "analytics", "sql", "okrs"],
+}
+GENERAL_SKILLS = ["git", "communication", "leadership", "mentoring", "excel", "project management", "java", "c++", "go", "spark"]
+FIRST_NAMES = ["Alex", "Sam", "Priya", "Wei", "Maria", "Omar", "Lena", "Kenji", "Ana", "Tom", "Fatima", "Ivan"]
+LAST_NAMES = ["Smith", "Patel", "Chen", "Garcia", "Khan", "Muller", "Tanaka", "Silva", "Novak", "Okafor", "Rossi", "Kim"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises", "Hooli", "Vandelay"]
+ACTIONS = ["Built", "Led", "Designed", "Automated", "Optimised", "Migrated", "Launched", "Maintained"]
+OUTCOMES = ["cutting costs by {n}%", "serving {n}k daily users", "reducing latency by {n}%", "for {n} internal teams", "improving retention by {n}%"]
+
+# === Synthetic resume and JD text ===
+def make_resume_text(rng, index):
+    role = rng.choice(list(ROLES))
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(ROLES[role], rng.randint(3, len(ROLES[role]))) + rng.sample(GENERAL_SKILLS, rng.randint(1, 4))
+
+    lines = [
+        name,
+        f"{role} (candidate {index})",
+        "",
+        "Summary",
+        f"{role} with {rng.randint(1, 15)} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "Skills",
+        ", ".join(skills),
+        "",
+        "Experience",
+    ]
+    for _ in range(rng.randint(2, 4)):
+        lines.append(f"{role} at {rng.choice(COMPANIES)} ({rng.randint(2008, 2023)})")
+        for _ in range(rng.randint(2, 4)):
+            outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 90))
+            lines.append(f"- {rng.choice(ACTIONS)} {rng.choice(skills)} systems, {outcome}.")
+    lines += ["", "Education", f"B.Sc. Computer Science, {rng.randint(2000, 2020)}"]
+    return "\n".join(lines)
+
+def make_jd_text(rng, role):
+    required = rng.sample(ROLES[role], 5)
+    nice_to_have = rng.sample(GENERAL_SKILLS, 3)
+    return "\n".join([
+        f"Job Title: {role}",
+        f"Company: {rng.choice(COMPANIES)}",
+        "",
+        f"We are hiring a {role} to join a growing team.",
+        "Requirements:",
+        *(f"- Experience with {skill}" for skill in required),
+        "Nice to have:",
+        *(f"- {skill}" for skill in nice_to_have),
+    ])
+
+# === Writers per format ===
+def write_txt(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def write_pdf(path, text):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=11)
+    pdf.multi_cell(0, 6, text.encode("latin-1", "replace").decode("latin-1"))
+    pdf.output(path)
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+def write_docx(path, text):
+    # Minimal WordprocessingML package: one paragraph per line, enough for docx2txt and Word
+    paragraphs = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>" for line in text.split("\n"))
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paragraphs}</w:body></w:document>"
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _DOCX_RELS)
+        archive.writestr("word/document.xml", document)
+
+WRITERS = {"pdf": write_pdf, "docx": write_docx, "txt": write_txt}
+
+# === Corpus Generator ===
+def generate_corpus(output_dir, size=100, formats=FORMATS, jds=1, seed=0):
+    # Same (size, formats, jds, seed) always produces the same files, so runs compare across commits
+    rng = random.Random(seed)
+    resume_dir = os.path.join(output_dir, RESUME_DIR)
+    jd_dir = os.path.join(output_dir, JD_DIR)
+    os.makedirs(resume_dir, exist_ok=True)
+    os.makedirs(jd_dir, exist_ok=True)
+
+    width = len(str(size))
+    for i in range(size):
+        fmt = formats[i % len(formats)]
+        path = os.path.join(resume_dir, f"resume_{i:0{width}d}.{fmt}")
+        WRITERS[fmt](path, make_resume_text(rng, i))
+        if (i + 1) % 1000 == 0:
+            print(f"📄 Generated {i + 1}/{size} resumes")
+
+    for j in range(jds):
+        role = list(ROLES)[j % len(ROLES)]
+        write_txt(os.path.join(jd_dir, f"jd_{j:03d}.txt"), make_jd_text(rng, role))
+
+    manifest = {"size": size, "formats": list(formats), "jds": jds, "seed": seed}
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def corpus_paths(corpus_dir):
+    resume_dir = os.path.join(corpus_dir, RESUME_DIR)
+    jd_dir = os.path.join(corpus_dir, JD_DIR)
+    resumes = sorted(os.path.join(resume_dir, f) for f in os.listdir(resume_dir))
+    jds = sorted(os.path.join(jd_dir, f) for f in os.listdir(jd_dir))
+    return resumes, jds
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume/JD corpus for benchmarks")
+    parser.add_argument("output_dir")
+    parser.add_argument("--size", type=int, default=100, help="Number of resumes")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Comma-separated subset of pdf,docx,txt (round-robin)")
+    parser.add_argument("--jds", type=int, default=1, help="Number of job descriptions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise SystemExit(f"❌ Unknown formats: {', '.join(sorted(unknown))}")
+
+    generate_corpus(args.output_dir, size=args.size, formats=formats, jds=args.jds, seed=args.seed)
+    print(f"✅ Corpus with {args.size} resumes and {args.jds} JDs written to {args.output_dir}")
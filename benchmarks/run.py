@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import platform
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+BENCHMARKS = ("extract_text", "score_resume", "create_resume_vector_index", "analyze_resume_with_rag", "process_batch")
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+# === Measurement helpers ===
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # not available on Windows
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    return usage / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def summarize(name, latencies, items, elapsed):
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]).tolist() if len(latencies_ms) else (None, None, None)
+    return {
+        "benchmark": name,
+        "items": items,
+        "total_seconds": elapsed,
+        "throughput_per_sec": items / elapsed if elapsed > 0 else None,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def time_each(fn, items):
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        item_start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - item_start)
+    return latencies, time.perf_counter() - start
+
+# === Benchmarks (each runs in its own fresh process) ===
+def _load_texts(resume_paths, jd_path):
+    from text_extractor import extract_text
+    texts = [text for text in (extract_text(path) for path in resume_paths) if text]
+    return texts, extract_text(jd_path)
+
+def bench_extract_text(resume_paths, jd_path, args):
+    from text_extractor import extract_text
+    latencies, elapsed = time_each(extract_text, resume_paths)
+    return summarize("extract_text", latencies, len(resume_paths), elapsed)
+
+def bench_score_resume(resume_paths, jd_path, args):
+    from scorer import score_resume
+    texts, jd_text = _load_texts(resume_paths, jd_path)
+    latencies, elapsed = time_each(lambda text: score_resume(text, jd_text), texts)
+    return summarize("score_resume", latencies, len(texts), elapsed)
+
+def bench_create_resume_vector_index(resume_paths, jd_path, args):
+    from vector_search import create_resume_vector_index
+    texts, _ = _load_texts(resume_paths, jd_path)
+    latencies, elapsed = time_each(create_resume_vector_index, texts)
+    return summarize("create_resume_vector_index", latencies, len(texts), elapsed)
+
+def bench_analyze_resume_with_rag(resume_paths, jd_path, args):
+    from rag_agent import analyze_resume_with_rag
+    texts, _ = _load_texts(resume_paths, jd_path)
+    query = "How can this resume be improved to better match the JD?"
+    latencies, elapsed = time_each(lambda text: analyze_resume_with_rag(text, query), texts)
+    return summarize("analyze_resume_with_rag", latencies, len(texts), elapsed)
+
+def bench_process_batch(resume_paths, jd_path, args):
+    from batch_ranker import process_batch
+
+    # process_batch takes a folder, so link the sampled resumes into one
+    folder = os.path.join(os.getcwd(), "batch_input")
+    os.makedirs(folder, exist_ok=True)
+    for path in resume_paths:
+        target = os.path.join(folder, os.path.basename(path))
+        try:
+            os.symlink(os.path.abspath(path), target)
+        except OSError:
+            shutil.copy(path, target)
+
+    latencies, elapsed = time_each(
+        lambda _: process_batch(folder, jd_path, workers=args.workers, top_k=args.top_k, output_base="batch_results"),
+        range(args.repeat),
+    )
+    return summarize("process_batch", latencies, len(resume_paths) * args.repeat, elapsed)
+
+BENCHMARK_FUNCS = {
+    "extract_text": bench_extract_text,
+    "score_resume": bench_score_resume,
+    "create_resume_vector_index": bench_create_resume_vector_index,
+    "analyze_resume_with_rag": bench_analyze_resume_with_rag,
+    "process_batch": bench_process_batch,
+}
+
+def _run_isolated(name, resume_paths, jd_path, base_url, args):
+    # Fresh caches and working directory per benchmark so every run starts cold; set before repo imports
+    work_dir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    os.environ["RESUME_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    os.environ["RESUME_LLM_CACHE"] = "0"
+    resume_paths = [os.path.abspath(path) for path in resume_paths]
+    jd_path = os.path.abspath(jd_path)
+    os.chdir(work_dir)
+    try:
+        return BENCHMARK_FUNCS[name](resume_paths, jd_path, args)
+    finally:
+        os.chdir(os.path.dirname(work_dir))
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def git_commit():
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# === Runner ===
+def run_benchmarks(corpus_dir, benchmarks=BENCHMARKS, sample=100, latency=0.05, ollama_url=None, args=None):
+    from benchmarks.corpus import corpus_paths
+
+    args = args or argparse.Namespace(repeat=1, top_k=None, workers=None)
+    resume_paths, jd_paths = corpus_paths(corpus_dir)
+    resume_paths = resume_paths[:sample] if sample else resume_paths
+
+    server = None
+    if ollama_url is None:
+        from ollama_stub import start_stub_server
+        server, ollama_url = start_stub_server(latency=latency)
+
+    results = []
+    try:
+        # One spawned process per benchmark keeps peak RSS and caches from leaking between them
+        context = multiprocessing.get_context("spawn")
+        for name in benchmarks:
+            print(f"⏱️ Running {name} on {len(resume_paths)} resumes")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_run_isolated, name, resume_paths, jd_paths[0], ollama_url, args).result()
+            results.append(result)
+            print(f"✅ {name}: {result['throughput_per_sec'] or 0:.1f}/s, p95 {result['p95_ms'] or 0:.1f} ms, peak RSS {result['peak_rss_mb'] or 0:.0f} MB")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": os.path.abspath(corpus_dir),
+        "sample": len(resume_paths),
+        "stub_latency_seconds": latency if server is not None else None,
+        "results": results,
+    }
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time the ranking pipeline against a synthetic corpus and an Ollama stub")
+    parser.add_argument("corpus_dir", help="Corpus from `python -m benchmarks.corpus` (generated here if missing)")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Comma-separated subset to run")
+    parser.add_argument("--sample", type=int, default=100, help="Resumes per benchmark (0 = whole corpus)")
+    parser.add_argument("--size", type=int, default=100, help="Corpus size if it has to be generated")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub Ollama seconds per request")
+    parser.add_argument("--ollama-url", default=None, help="Benchmark a real Ollama server instead of the stub")
+    parser.add_argument("--repeat", type=int, default=1, help="End-to-end process_batch runs")
+    parser.add_argument("--top-k", type=int, default=None, help="process_batch feedback shortlist")
+    parser.add_argument("--workers", type=int, default=None, help="process_batch extraction processes")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON results file")
+    args = parser.parse_args()
+
+    names = tuple(name.strip() for name in args.benchmarks.split(",") if name.strip())
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"❌ Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    if not os.path.exists(args.corpus_dir):
+        from benchmarks.corpus import generate_corpus
+        generate_corpus(args.corpus_dir, size=args.size)
+
+    report = run_benchmarks(args.corpus_dir, names, sample=args.sample, latency=args.latency, ollama_url=args.ollama_url, args=args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Benchmark results saved to {args.output}")
@@ -0,0 +1,262 @@
+import os
+import json
+import argparse
+import faiss
+import numpy as np
+from vector_search import CachedEmbeddings, split_resume
+
+INDEX_FILE = "index.faiss"
+META_FILE = "meta.json"
+
+# Fetch this many chunks per requested candidate before aggregating
+SEARCH_OVERSAMPLE = 8
+
+# Small corpora use an exact flat scan; from IVF_MIN_VECTORS chunks on, an IVF index probes
+# NPROBE of its clusters per query instead of every vector. The clusters are retrained when
+# the corpus has grown RETRAIN_GROWTH-fold since they were trained.
+IVF_MIN_VECTORS = int(os.environ.get("RESUME_INDEX_IVF_MIN", "4096"))
+NPROBE = int(os.environ.get("RESUME_INDEX_NPROBE", "16"))
+RETRAIN_GROWTH = 4
+
+def _ivf_nlist(n):
+    # ~4*sqrt(n) clusters, with at least 39 training points per cluster as FAISS expects
+    return max(1, min(int(4 * np.sqrt(n)), n // 39))
+
+def _set_nprobe(index):
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(NPROBE, ivf.nlist)
+
+def _write_atomic(path, write):
+    tmp_path = path + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+# === Persistent Corpus-Wide Resume Index ===
+# One FAISS inner-product index over normalised chunk vectors for every
+# resume, with chunk ids mapped back to candidate ids so candidates can be
+# added, updated or removed without rebuilding the whole index.
+class CorpusIndex:
+    def __init__(self, index_dir, model_name="mistral"):
+        self.index_dir = index_dir
+        self.model_name = model_name
+        self.embeddings = CachedEmbeddings(model_name)
+        self.index = None
+        self.candidate_chunks = {}
+        self.chunk_owner = {}
+        self.next_id = 0
+        self.trained_size = 0     # chunks the IVF clusters were trained on (0: flat index)
+        self.index_file = None    # current generation's index file, recorded in meta.json
+        self._read_only = False
+
+    def __len__(self):
+        return len(self.candidate_chunks)
+
+    # === Internal helpers ===
+    def _embed(self, texts, query=False):
+        if query:
+            vectors = np.asarray([self.embeddings.embed_query(texts[0])], dtype=np.float32)
+        else:
+            vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def _writable_index(self, dim):
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        elif self._read_only:
+            # Memory-mapped indexes are read-only; load a private copy before mutating
+            self.index = faiss.read_index(os.path.join(self.index_dir, self.index_file))
+            _set_nprobe(self.index)
+            self._read_only = False
+        return self.index
+
+    def _maybe_reindex(self):
+        # Flat -> IVF once the corpus is big enough, and a retrain after substantial growth
+        n = self.index.ntotal
+        if n < IVF_MIN_VECTORS or (self.trained_size and n < self.trained_size * RETRAIN_GROWTH):
+            return
+        ids = np.asarray(sorted(self.chunk_owner), dtype=np.int64)
+        vectors = self.index.reconstruct_batch(ids)
+        dim = vectors.shape[1]
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, _ivf_nlist(n), faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        # The hashtable direct map keeps remove_ids and reconstruct working by chunk id
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        index.add_with_ids(vectors, ids)
+        _set_nprobe(index)
+        self.index = index
+        self.trained_size = n
+        print(f"🔍 Re-clustered {n} chunks into {index.nlist} IVF lists (nprobe {index.nprobe})")
+
+    # === Incremental updates ===
+    def add_many(self, items):
+        # items: iterable of (candidate_id, resume_text); existing candidates are replaced
+        owners = []
+        chunks = []
+        for candidate_id, resume_text in items:
+            if candidate_id in self.candidate_chunks:
+                self.remove(candidate_id)
+            for doc in split_resume(resume_text):
+                owners.append(candidate_id)
+                chunks.append(doc.page_content)
+        if not chunks:
+            return 0
+
+        vectors = self._embed(chunks)
+        ids = np.arange(self.next_id, self.next_id + len(chunks), dtype=np.int64)
+        self._writable_index(vectors.shape[1]).add_with_ids(vectors, ids)
+        self.next_id += len(chunks)
+
+        for chunk_id, candidate_id in zip(ids.tolist(), owners):
+            self.chunk_owner[chunk_id] = candidate_id
+            self.candidate_chunks.setdefault(candidate_id, []).append(chunk_id)
+        self._maybe_reindex()
+        return len(chunks)
+
+    def add(self, candidate_id, resume_text):
+        return self.add_many([(candidate_id, resume_text)])
+
+    def update(self, candidate_id, resume_text):
+        return self.add_many([(candidate_id, resume_text)])
+
+    def remove(self, candidate_id):
+        chunk_ids = self.candidate_chunks.pop(candidate_id, None)
+        if not chunk_ids:
+            return False
+        index = self._writable_index(self.index.d)
+        index.remove_ids(np.asarray(chunk_ids, dtype=np.int64))
+        for chunk_id in chunk_ids:
+            self.chunk_owner.pop(chunk_id, None)
+        return True
+
+    # === JD Shortlist Query ===
+    def shortlist(self, jd_text, k=10):
+        if self.index is None or self.index.ntotal == 0:
+            return []
+
+        query = self._embed([jd_text], query=True)
+        n_chunks = min(self.index.ntotal, k * SEARCH_OVERSAMPLE)
+        while True:
+            scores, ids = self.index.search(query, n_chunks)
+
+            # Aggregate chunk hits per candidate by their best-matching chunk
+            best = {}
+            for score, chunk_id in zip(scores[0].tolist(), ids[0].tolist()):
+                candidate_id = self.chunk_owner.get(chunk_id)
+                if candidate_id is not None and candidate_id not in best:
+                    best[candidate_id] = score
+
+            # -1 ids: the probed IVF lists hold fewer chunks than asked for, so asking again won't help
+            if len(best) >= k or n_chunks >= self.index.ntotal or ids[0][-1] == -1:
+                break
+            n_chunks = min(self.index.ntotal, n_chunks * 2)
+
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:k]
+
+    # === Persistence ===
+    # Each save writes a new index-<n>.faiss, then atomically replaces meta.json to point at it;
+    # a crash at any point leaves the previous index and meta.json as a consistent pair.
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        previous_file = self.index_file
+        if self.index is not None and not self._read_only:
+            self.index_file = f"index-{self.next_id}-{len(self.candidate_chunks)}-{os.getpid()}.faiss"
+            _write_atomic(os.path.join(self.index_dir, self.index_file), lambda path: faiss.write_index(self.index, path))
+        meta = {
+            "model_name": self.model_name,
+            "embedding_backend": self.embeddings.backend.cache_key,
+            "next_id": self.next_id,
+            "trained_size": self.trained_size,
+            "index_file": self.index_file,
+            "candidates": self.candidate_chunks,
+        }
+
+        def write_meta(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+                f.flush()
+                os.fsync(f.fileno())
+        _write_atomic(os.path.join(self.index_dir, META_FILE), write_meta)
+
+        if previous_file and previous_file != self.index_file:
+            try:
+                os.remove(os.path.join(self.index_dir, previous_file))
+            except OSError:
+                pass
+
+    @classmethod
+    def load(cls, index_dir, mmap=True):
+        with open(os.path.join(index_dir, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        corpus = cls(index_dir, model_name=meta["model_name"])
+        # Vectors from different backends live in different spaces (and usually dimensions)
+        built_with = meta.get("embedding_backend", meta["model_name"])
+        if built_with != corpus.embeddings.backend.cache_key:
+            raise ValueError(
+                f"Index in {index_dir} was built with embedding backend '{built_with}', "
+                f"not '{corpus.embeddings.backend.cache_key}'; rebuild it or switch RESUME_EMBEDDING_BACKEND."
+            )
+        corpus.next_id = meta["next_id"]
+        corpus.trained_size = meta.get("trained_size", 0)
+        corpus.candidate_chunks = {c: ids for c, ids in meta["candidates"].items()}
+        corpus.chunk_owner = {i: c for c, ids in corpus.candidate_chunks.items() for i in ids}
+
+        # Indexes saved before generations were introduced are plain index.faiss
+        corpus.index_file = meta.get("index_file") or INDEX_FILE
+        index_path = os.path.join(index_dir, corpus.index_file)
+        if os.path.exists(index_path):
+            if mmap:
+                corpus.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                corpus._read_only = True
+            else:
+                corpus.index = faiss.read_index(index_path)
+            _set_nprobe(corpus.index)
+        return corpus
+
+    @classmethod
+    def open(cls, index_dir, model_name="mistral", mmap=True):
+        if os.path.exists(os.path.join(index_dir, META_FILE)):
+            return cls.load(index_dir, mmap=mmap)
+        return cls(index_dir, model_name=model_name)
+
+# === Main ===
+if __name__ == '__main__':
+    from text_extractor import TEXT_EXTENSIONS, extract_text
+
+    parser = argparse.ArgumentParser(description="Maintain a corpus-wide resume index and shortlist candidates for a JD")
+    parser.add_argument("--index-dir", default="corpus_index")
+    parser.add_argument("--model", default="mistral")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = sub.add_parser("add", help="Add or update every resume in a folder")
+    add_parser.add_argument("resume_folder")
+
+    remove_parser = sub.add_parser("remove", help="Remove candidates by id (resume filename)")
+    remove_parser.add_argument("candidate_ids", nargs="+")
+
+    shortlist_parser = sub.add_parser("shortlist", help="Top-k candidates for a JD file")
+    shortlist_parser.add_argument("jd_file")
+    shortlist_parser.add_argument("-k", type=int, default=10)
+
+    args = parser.parse_args()
+    corpus = CorpusIndex.open(args.index_dir, model_name=args.model)
+
+    if args.command == "add":
+        filenames = sorted(f for f in os.listdir(args.resume_folder) if f.lower().endswith(TEXT_EXTENSIONS))
+        items = [(f, extract_text(os.path.join(args.resume_folder, f))) for f in filenames]
+        added = corpus.add_many((f, text) for f, text in items if text)
+        corpus.save()
+        print(f"✅ Indexed {added} chunks; corpus now holds {len(corpus)} candidates.")
+    elif args.command == "remove":
+        removed = sum(corpus.remove(candidate_id) for candidate_id in args.candidate_ids)
+        corpus.save()
+        print(f"✅ Removed {removed} candidates; corpus now holds {len(corpus)} candidates.")
+    elif args.command == "shortlist":
+        jd_text = extract_text(args.jd_file)
+        if not jd_text:
+            raise SystemExit("❌ Job description could not be extracted.")
+        for rank, (candidate_id, score) in enumerate(corpus.shortlist(jd_text, args.k), start=1):
+            print(f"{rank:>3}. {candidate_id}  ({score:.3f})")
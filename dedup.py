@@ -0,0 +1,100 @@
+import os
+import re
+import zlib
+import numpy as np
+
+# === Near-Duplicate Detection Settings ===
+# Estimated Jaccard similarity of word shingles at or above which two resumes are one candidate
+DEDUP_THRESHOLD = float(os.environ.get("RESUME_DEDUP_THRESHOLD", "0.9"))
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+
+_WORD_PATTERN = re.compile(r"\w+")
+_PRIME = np.uint64(4294967311)  # smallest prime above 2^32
+_SEED = 1  # fixed, so signatures are comparable across runs
+
+def _permutations(num_perm):
+    rng = np.random.RandomState(_SEED)
+    a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+# === MinHash signatures ===
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    # 32-bit hashes of overlapping word n-grams, so reordered sections and small edits still overlap
+    tokens = _WORD_PATTERN.findall(text.lower())
+    hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint64, count=len(tokens))
+    if len(hashes) > size:
+        combined = hashes[:len(hashes) - size + 1].copy()
+        for offset in range(1, size):
+            combined = (combined * np.uint64(1000003) + hashes[offset:len(hashes) - size + 1 + offset]) & np.uint64(0xFFFFFFFF)
+        hashes = combined
+    return np.unique(hashes)
+
+def minhash_signatures(texts, num_perm=NUM_PERM):
+    # (len(texts), num_perm) uint64; rows of empty texts are None-like (all max) and never match
+    a, b = _permutations(num_perm)
+    signatures = np.full((len(texts), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = shingle_hashes(text)
+        if len(hashes):
+            signatures[i] = ((a * hashes[None, :] + b) % _PRIME).min(axis=1)
+    return signatures
+
+# === LSH banding ===
+def lsh_params(threshold, num_perm=NUM_PERM):
+    # (bands, rows) whose S-curve midpoint (1/bands)^(1/rows) sits closest below the threshold:
+    # erring low admits a few extra candidates, which are verified, rather than missing duplicates
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        midpoint = (1.0 / bands) ** (1.0 / rows)
+        if midpoint <= threshold and (best is None or midpoint > best[0]):
+            best = (midpoint, bands, rows)
+    return (best[1], best[2]) if best else (num_perm, 1)
+
+# === Duplicate clusters ===
+def find_duplicate_clusters(texts, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM):
+    # Returns, for every text, the index of its cluster's representative (the first member in
+    # input order); unique texts are their own representative.
+    texts = list(texts)
+    n = len(texts)
+    parent = list(range(n))
+    if n < 2:
+        return parent
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = minhash_signatures(texts, num_perm)
+    empty = (signatures == np.iinfo(np.uint64).max).all(axis=1)
+    bands, rows = lsh_params(threshold, num_perm)
+
+    for band in range(bands):
+        buckets = {}
+        band_signatures = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(n):
+            if not empty[i]:
+                buckets.setdefault(band_signatures[i].tobytes(), []).append(i)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # Compare each member with one resume per cluster already seen in this bucket
+            roots = []
+            for i in members:
+                root = find(i)
+                match = next((r for r in roots if r == root or np.mean(signatures[i] == signatures[r]) >= threshold), None)
+                if match is None:
+                    roots.append(root)
+                elif match != root:
+                    low, high = sorted((root, match))
+                    parent[high] = low
+                    roots = list(dict.fromkeys(find(r) for r in roots))
+
+    return [find(i) for i in range(n)]
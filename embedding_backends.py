@@ -0,0 +1,90 @@
+import os
+import abc
+import numpy as np
+from ollama_client import get_ollama_embeddings
+from resources import get_resource
+
+# === Embedding Backend Settings ===
+# RESUME_EMBEDDING_BACKEND: "ollama[:model]" (default), "sentence-transformers[:model_dir]" or "hashing[:dim]"
+EMBEDDING_BACKEND = os.environ.get("RESUME_EMBEDDING_BACKEND", "ollama")
+SENTENCE_TRANSFORMERS_MODEL_DIR = os.environ.get("RESUME_ST_MODEL_DIR", os.path.join("models", "all-MiniLM-L6-v2"))
+EMBEDDING_BATCH_SIZE = int(os.environ.get("RESUME_EMBEDDING_BATCH_SIZE", "64"))
+HASHING_DIM = int(os.environ.get("RESUME_HASHING_DIM", "384"))
+
+# === Backend interface ===
+# embed() takes a list of texts and returns a float32 (len(texts), dim) array; callers slice
+# their input into batch_size pieces. cache_key names the vector space in the embedding cache.
+class EmbeddingBackend(abc.ABC):
+    cache_key = None
+    batch_size = EMBEDDING_BATCH_SIZE
+    remote = False     # embedded over HTTP, one request per text
+    cacheable = True   # worth a disk-cache lookup per text
+
+    @abc.abstractmethod
+    def embed(self, texts):
+        ...
+
+class OllamaBackend(EmbeddingBackend):
+    remote = True
+
+    def __init__(self, model_name="mistral"):
+        self.model_name = model_name
+        # Plain model name, as before backends existed, so existing cache entries keep hitting
+        self.cache_key = model_name
+
+    def embed(self, texts):
+        return np.asarray(get_ollama_embeddings(self.model_name).embed_documents(list(texts)), dtype=np.float32)
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    def __init__(self, model_dir=SENTENCE_TRANSFORMERS_MODEL_DIR, batch_size=EMBEDDING_BATCH_SIZE, device="cpu"):
+        self.model_dir = model_dir
+        self.batch_size = batch_size
+        self.device = device
+        # Full path, not the directory name: two models in different "all-MiniLM-L6-v2" folders
+        # must not read each other's cached vectors
+        self.cache_key = f"sentence-transformers:{os.path.abspath(model_dir)}"
+
+    @property
+    def model(self):
+        def create():
+            # Local directory only: batch runs must not reach out to the model hub
+            if not os.path.isdir(self.model_dir):
+                raise FileNotFoundError(f"Sentence-transformers model directory not found: {self.model_dir}")
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(self.model_dir, device=self.device)
+        return get_resource(f"sentence-transformers:{os.path.abspath(self.model_dir)}:{self.device}", create)
+
+    def embed(self, texts):
+        vectors = self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False)
+        return vectors.astype(np.float32, copy=False)
+
+class HashingBackend(EmbeddingBackend):
+    # Signed feature hashing of words and bigrams: deterministic across processes and machines,
+    # no model download, no network. Meant for tests, benchmarks and offline runs.
+    batch_size = 4096
+    cacheable = False  # recomputing is cheaper than a cache read
+
+    def __init__(self, dim=HASHING_DIM):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.dim = dim
+        self.cache_key = f"hashing:{dim}"
+        self._vectorizer = HashingVectorizer(n_features=dim, ngram_range=(1, 2), alternate_sign=True, norm="l2")
+
+    def embed(self, texts):
+        return self._vectorizer.transform(list(texts)).toarray().astype(np.float32)
+
+# === Backend selection (one shared instance per spec) ===
+def get_embedding_backend(spec=None, model_name="mistral"):
+    spec = spec or EMBEDDING_BACKEND
+    kind, _, arg = spec.partition(":")
+    if kind == "ollama":
+        name = arg or model_name
+        return get_resource(f"embedding-backend:ollama:{name}", lambda: OllamaBackend(name))
+    if kind in ("sentence-transformers", "st"):
+        model_dir = arg or SENTENCE_TRANSFORMERS_MODEL_DIR
+        return get_resource(f"embedding-backend:st:{model_dir}", lambda: SentenceTransformerBackend(model_dir))
+    if kind == "hashing":
+        dim = int(arg) if arg else HASHING_DIM
+        return get_resource(f"embedding-backend:hashing:{dim}", lambda: HashingBackend(dim))
+    raise ValueError(f"Unknown embedding backend: {spec}")
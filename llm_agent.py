@@ -1,14 +1,15 @@
-from langchain_community.llms import Ollama
-from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
+from ollama_client import get_ollama_llm
+from resources import get_resource
 
-# === Step 1: Load the Mistral model from Ollama ===
-try:
-    llm = Ollama(model="mistral")  # Make sure mistral is running in Ollama
-    print("✅ Mistral LLM loaded via Ollama")
-except Exception as e:
-    print("❌ Failed to connect to Mistral via Ollama:", e)
-    raise
+# === Step 1: Load the Mistral model from Ollama (on first use, not at import) ===
+def get_llm():
+    try:
+        llm = get_ollama_llm("mistral")  # Make sure mistral is running in Ollama
+    except Exception as e:
+        print("❌ Failed to connect to Mistral via Ollama:", e)
+        raise
+    return llm
 
 # === Step 2: Create a basic prompt template for now ===
 prompt_template = PromptTemplate(
@@ -23,15 +24,29 @@ prompt_template = PromptTemplate(
 )
 
 # === Step 3: Create LLMChain ===
-llm_chain = LLMChain(
-    llm=llm,
-    prompt=prompt_template,
-    verbose=True
-)
+def get_llm_chain():
+    def create():
+        from langchain.chains import LLMChain
+        chain = LLMChain(
+            llm=get_llm(),
+            prompt=prompt_template,
+            verbose=True
+        )
+        print("✅ Mistral LLM loaded via Ollama")
+        return chain
+    return get_resource("llm_agent:chain", create)
+
+# Keep `llm_agent.llm` / `llm_agent.llm_chain` working, resolved lazily
+def __getattr__(name):
+    if name == "llm":
+        return get_llm()
+    if name == "llm_chain":
+        return get_llm_chain()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # === Step 4: Test it with a sample query ===
 if __name__ == '__main__':
     test_query = "What are the candidate's top technical skills?"
-    response = llm_chain.run({"query": test_query})
+    response = get_llm_chain().run({"query": test_query})
     print("\n🧠 LLM Response:")
     print(response)
@@ -0,0 +1,200 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import deque
+from disk_cache import CACHE_DIR, hash_key
+from metrics import incr, metrics, span
+
+# === LLM Response Cache Settings ===
+LLM_CACHE_PATH = os.environ.get("RESUME_LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_responses.sqlite3"))
+LLM_CACHE_ENABLED = os.environ.get("RESUME_LLM_CACHE", "1") != "0"
+LLM_CACHE_TTL = float(os.environ.get("RESUME_LLM_CACHE_TTL_HOURS", "168")) * 3600
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("RESUME_LLM_CACHE_MAX_ENTRIES", "20000"))
+
+# === SQLite-backed cache of generations, keyed by (rendered prompt, model) ===
+class LLMResponseCache:
+    def __init__(self, path=LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Opened on first use so importing this module never touches disk
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    gen_seconds REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, prompt, model_name):
+        key = hash_key(model_name, prompt)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response, created, gen_seconds FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            self.saved_seconds += row[2]
+            return row[0]
+
+    def set(self, prompt, model_name, response, gen_seconds=0.0):
+        key = hash_key(model_name, prompt)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, last_used, gen_seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, now, now, gen_seconds),
+            )
+            # Drop expired rows, then the least recently used ones beyond the size limit
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+response_cache = LLMResponseCache()
+
+# === Per-request generation timings ===
+# Time-to-first-token is only known for streamed requests; cache hits count as instant.
+generation_timings = deque(maxlen=1000)
+
+def _count_generation(prompt, response, cached):
+    incr("llm_requests")
+    incr("llm_prompt_chars", len(prompt))
+    incr("llm_completion_chars", len(response))
+    if cached:
+        incr("llm_cache_hits")
+
+def _record_timing(model_name, total_seconds, ttft_seconds=None, cached=False, streamed=False, timings=None):
+    entry = {
+        "model": model_name,
+        "ttft_seconds": ttft_seconds,
+        "total_seconds": total_seconds,
+        "cached": cached,
+        "streamed": streamed,
+    }
+    generation_timings.append(entry)
+    if timings is not None:
+        timings.update(entry)
+
+# === Cached generation wrappers ===
+def cached_generate(prompt, model_name, generate, use_cache=True):
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    start = time.perf_counter()
+    if use_cache:
+        cached = response_cache.get(prompt, model_name)
+        if cached is not None:
+            _record_timing(model_name, time.perf_counter() - start, cached=True)
+            _count_generation(prompt, cached, cached=True)
+            return cached
+
+    with span("llm.generate"):
+        response = generate(prompt)
+    elapsed = time.perf_counter() - start
+    if use_cache:
+        response_cache.set(prompt, model_name, response, elapsed)
+    _record_timing(model_name, elapsed)
+    _count_generation(prompt, response, cached=False)
+    return response
+
+async def acached_generate(prompt, model_name, agenerate, use_cache=True):
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    start = time.perf_counter()
+    if use_cache:
+        cached = response_cache.get(prompt, model_name)
+        if cached is not None:
+            _record_timing(model_name, time.perf_counter() - start, cached=True)
+            _count_generation(prompt, cached, cached=True)
+            return cached
+
+    with span("llm.generate"):
+        response = await agenerate(prompt)
+    elapsed = time.perf_counter() - start
+    if use_cache:
+        response_cache.set(prompt, model_name, response, elapsed)
+    _record_timing(model_name, elapsed)
+    _count_generation(prompt, response, cached=False)
+    return response
+
+def cached_stream(prompt, model_name, stream, use_cache=True, timings=None):
+    # Yields text chunks; a cache hit arrives as one chunk. Pass a dict as timings to receive
+    # this request's ttft_seconds / total_seconds once the stream is exhausted.
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    start = time.perf_counter()
+    if use_cache:
+        cached = response_cache.get(prompt, model_name)
+        if cached is not None:
+            elapsed = time.perf_counter() - start
+            _record_timing(model_name, elapsed, elapsed, cached=True, streamed=True, timings=timings)
+            _count_generation(prompt, cached, cached=True)
+            yield cached
+            return
+
+    chunks = []
+    ttft = None
+    for chunk in stream(prompt):
+        if ttft is None:
+            ttft = time.perf_counter() - start
+        chunks.append(chunk)
+        yield chunk
+
+    elapsed = time.perf_counter() - start
+    response = "".join(chunks)
+    if use_cache:
+        response_cache.set(prompt, model_name, response, elapsed)
+    _record_timing(model_name, elapsed, ttft, streamed=True, timings=timings)
+    _count_generation(prompt, response, cached=False)
+    metrics.observe("llm.stream", elapsed)
+    if ttft is not None:
+        metrics.observe("llm.first_token", ttft)
+
+def llm_cache_stats():
+    return response_cache.stats()
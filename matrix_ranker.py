@@ -0,0 +1,143 @@
+import os
+import csv
+import time
+import argparse
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from batch_ranker import ingest_resumes
+from metrics import span
+from report_renderer import unique_report_names
+from skill_matcher import get_skill_matcher
+
+OUTPUT_DIR = "matrix_ranking_results"
+CANDIDATE_TABLE = "candidates_top_jds.csv"
+
+# Dense score blocks are at most CHUNK_ROWS resumes x CHUNK_COLS JDs (4096 x 512 float32 = 8 MB)
+CHUNK_ROWS = int(os.environ.get("RESUME_MATRIX_CHUNK_ROWS", "4096"))
+CHUNK_COLS = int(os.environ.get("RESUME_MATRIX_CHUNK_COLS", "512"))
+
+# === Running top-k over score blocks ===
+def _merge_topk(best_scores, best_ids, scores, ids, k):
+    # Row-wise: keep the k highest of (current best + new block) without sorting the block
+    scores = np.concatenate([best_scores, scores], axis=1)
+    ids = np.concatenate([best_ids, ids], axis=1)
+    if scores.shape[1] > k:
+        keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, keep, axis=1)
+        ids = np.take_along_axis(ids, keep, axis=1)
+    return scores, ids
+
+def _sorted_rows(scores, ids):
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+# === Many JDs x many resumes ===
+# One TF-IDF vocabulary over every resume and JD, then sparse products block by block, so
+# memory is bounded by the block size plus the top-k tables, not by resumes x JDs.
+def match_matrix(resume_texts, jd_texts, top_k=10, top_jds=5, chunk_rows=CHUNK_ROWS, chunk_cols=CHUNK_COLS):
+    # Returns ((jd_scores, jd_resume_ids), (candidate_scores, candidate_jd_ids)), each row best first
+    n, m = len(resume_texts), len(jd_texts)
+    top_k, top_jds = min(top_k, n), min(top_jds, m)
+
+    with span("matrix.vectorize"):
+        vectorizer = TfidfVectorizer(stop_words='english', dtype=np.float32)
+        vectors = vectorizer.fit_transform(list(resume_texts) + list(jd_texts)).tocsr()
+        resume_vectors = vectors[:n]
+        jd_vectors_t = vectors[n:].T.tocsc()  # column slices of the transpose are cheap in CSC
+
+    jd_scores = np.full((m, top_k), -np.inf, dtype=np.float32)
+    jd_ids = np.full((m, top_k), -1, dtype=np.int64)
+    candidate_scores = np.full((n, top_jds), -np.inf, dtype=np.float32)
+    candidate_ids = np.full((n, top_jds), -1, dtype=np.int64)
+
+    with span("matrix.score"):
+        for r0 in range(0, n, chunk_rows):
+            r1 = min(r0 + chunk_rows, n)
+            rows = resume_vectors[r0:r1]
+            resume_range = np.arange(r0, r1, dtype=np.int64)
+            for c0 in range(0, m, chunk_cols):
+                c1 = min(c0 + chunk_cols, m)
+                # Rows are L2-normalised, so the product is the cosine similarity block
+                block = (rows @ jd_vectors_t[:, c0:c1]).toarray()
+                jd_range = np.arange(c0, c1, dtype=np.int64)
+
+                if top_k:
+                    jd_scores[c0:c1], jd_ids[c0:c1] = _merge_topk(
+                        jd_scores[c0:c1], jd_ids[c0:c1], block.T, np.broadcast_to(resume_range, (c1 - c0, r1 - r0)), top_k
+                    )
+                if top_jds:
+                    candidate_scores[r0:r1], candidate_ids[r0:r1] = _merge_topk(
+                        candidate_scores[r0:r1], candidate_ids[r0:r1], block, np.broadcast_to(jd_range, (r1 - r0, c1 - c0)), top_jds
+                    )
+
+    return _sorted_rows(jd_scores, jd_ids), _sorted_rows(candidate_scores, candidate_ids)
+
+# === Matrix run over folders ===
+def run_matrix(resume_folder, jd_folder, top_k=10, top_jds=5, output_dir=OUTPUT_DIR, ocr=False, workers=None,
+               chunk_rows=CHUNK_ROWS, chunk_cols=CHUNK_COLS):
+    start = time.perf_counter()
+    with span("matrix.ingest"):
+        jd_files, jd_texts = ingest_resumes(jd_folder, ocr=ocr, workers=workers)
+        resume_files, resume_texts = ingest_resumes(resume_folder, ocr=ocr, workers=workers)
+    if not jd_texts:
+        raise ValueError("No job descriptions could be extracted.")
+
+    (jd_scores, jd_ids), (candidate_scores, candidate_ids) = match_matrix(
+        resume_texts, jd_texts, top_k=top_k, top_jds=top_jds, chunk_rows=chunk_rows, chunk_cols=chunk_cols
+    )
+
+    # Skills only for resumes that made some JD's shortlist
+    matcher = get_skill_matcher()
+    jd_skills = matcher.match_many(jd_texts)
+    resume_skills = {}
+
+    def matched_skills(resume_id, jd_id):
+        if resume_id not in resume_skills:
+            resume_skills[resume_id] = matcher.match(resume_texts[resume_id])
+        return matcher.matched_skills(resume_skills[resume_id], jd_skills[jd_id])
+
+    os.makedirs(output_dir, exist_ok=True)
+    table_names = unique_report_names([os.path.splitext(f)[0] for f in jd_files])
+    written = []
+    for jd_id, table_name in enumerate(table_names):
+        output_path = os.path.join(output_dir, f"{table_name}.csv")
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Rank", "Resume File", "Match Score", "Matched Skills"])
+            for rank, (score, resume_id) in enumerate(zip(jd_scores[jd_id].tolist(), jd_ids[jd_id].tolist()), start=1):
+                writer.writerow([rank, resume_files[resume_id], score, ", ".join(matched_skills(resume_id, jd_id))])
+        written.append(output_path)
+
+    candidate_path = os.path.join(output_dir, CANDIDATE_TABLE)
+    with open(candidate_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Resume File", "Rank", "Job Description", "Match Score"])
+        for resume_id, resume_file in enumerate(resume_files):
+            for rank, (score, jd_id) in enumerate(zip(candidate_scores[resume_id].tolist(), candidate_ids[resume_id].tolist()), start=1):
+                writer.writerow([resume_file, rank, jd_files[jd_id], score])
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Ranked {len(resume_files)} resumes against {len(jd_files)} JDs in {elapsed:.1f}s. Tables saved to {output_dir}")
+    return written, candidate_path
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rank every resume in a folder against every JD in another folder")
+    parser.add_argument("resume_folder")
+    parser.add_argument("jd_folder")
+    parser.add_argument("--top-k", type=int, default=10, help="Candidates kept per JD")
+    parser.add_argument("--top-jds", type=int, default=5, help="JDs kept per candidate")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="One <jd>.csv per JD plus " + CANDIDATE_TABLE)
+    parser.add_argument("--ocr", action="store_true", help="OCR scanned PDFs and image resumes")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Resumes per score block")
+    parser.add_argument("--chunk-cols", type=int, default=CHUNK_COLS, help="JDs per score block")
+    args = parser.parse_args()
+
+    try:
+        run_matrix(
+            args.resume_folder, args.jd_folder, top_k=args.top_k, top_jds=args.top_jds, output_dir=args.output_dir,
+            ocr=args.ocr, workers=args.workers, chunk_rows=args.chunk_rows, chunk_cols=args.chunk_cols,
+        )
+    except Exception as e:
+        print("❌ Error:", e)
@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import time
+import threading
+
+# === Pipeline Metrics Settings ===
+# Off by default; RESUME_METRICS=1 (or enable()) turns recording on
+METRICS_ENABLED = os.environ.get("RESUME_METRICS", "0") == "1"
+PROMETHEUS_PREFIX = "resume_"
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+# === Process-wide registry of timing spans and counters ===
+# Spans record wall time per call; concurrent or nested spans overlap, so their totals don't add up to the run time.
+class MetricsRegistry:
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.counters = {}
+        self.spans = {}  # name -> [count, total_seconds, max_seconds]
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        # Disabled: a shared no-op context manager, so instrumented code pays one attribute check
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.spans.get(name)
+            if entry is None:
+                entry = self.spans[name] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def incr(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.spans = {}
+
+    # === Cross-process merging (worker pools send their snapshots back) ===
+    def snapshot(self):
+        with self._lock:
+            return {"counters": dict(self.counters), "spans": {name: list(entry) for name, entry in self.spans.items()}}
+
+    def merge(self, snapshot):
+        if not self.enabled or not snapshot:
+            return
+        with self._lock:
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, (count, total, longest) in snapshot["spans"].items():
+                entry = self.spans.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += count
+                entry[1] += total
+                entry[2] = max(entry[2], longest)
+
+    # === Export ===
+    def summary(self):
+        snapshot = self.snapshot()
+        return {
+            "counters": dict(sorted(snapshot["counters"].items())),
+            "spans": {
+                name: {"count": count, "total_seconds": total, "mean_seconds": total / count if count else 0.0, "max_seconds": longest}
+                for name, (count, total, longest) in sorted(snapshot["spans"].items())
+            },
+        }
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        summary = self.summary()
+        lines = []
+        for name, value in summary["counters"].items():
+            metric = prefix + re.sub(r"[^a-zA-Z0-9_]", "_", name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+        stage_metrics = (
+            ("stage_calls_total", "counter", "count"),
+            ("stage_seconds_total", "counter", "total_seconds"),
+            ("stage_max_seconds", "gauge", "max_seconds"),
+        )
+        for suffix, kind, field in stage_metrics:
+            if summary["spans"]:
+                lines.append(f"# TYPE {prefix}{suffix} {kind}")
+            for name, stats in summary["spans"].items():
+                lines.append(f'{prefix}{suffix}{{stage="{name}"}} {stats[field]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_base, **run_info):
+        # <base>.metrics.json for humans and diffs, <base>.prom for the node_exporter textfile collector
+        json_path = output_base + ".metrics.json"
+        prom_path = output_base + ".prom"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"run": run_info, **self.summary()}, f, indent=2)
+        with open(prom_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        return json_path, prom_path
+
+metrics = MetricsRegistry()
+
+# Module-level shortcuts for instrumented code
+span = metrics.span
+incr = metrics.incr
+
+def enable():
+    metrics.enabled = True
+
+def disable():
+    metrics.enabled = False
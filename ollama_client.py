@@ -0,0 +1,58 @@
+import os
+import asyncio
+import httpx
+from resources import get_resource
+
+# === Ollama HTTP Settings ===
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+DEFAULT_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "120"))
+DEFAULT_CONCURRENCY = int(os.environ.get("OLLAMA_CONCURRENCY", "4"))
+# Context window requested from Ollama on every generation (its own default is smaller);
+# rag_agent sizes prompts against the same number
+CONTEXT_TOKENS = int(os.environ.get("RESUME_CONTEXT_TOKENS", "4096"))
+
+# === Shared LangChain clients (created on first use, one per model) ===
+def get_ollama_llm(model_name="mistral"):
+    def create():
+        from langchain_community.llms import Ollama
+        return Ollama(model=model_name, base_url=OLLAMA_BASE_URL, num_ctx=CONTEXT_TOKENS)
+    return get_resource(f"ollama-llm:{model_name}", create)
+
+def get_ollama_embeddings(model_name="mistral"):
+    def create():
+        from langchain_community.embeddings import OllamaEmbeddings
+        return OllamaEmbeddings(model=model_name, base_url=OLLAMA_BASE_URL)
+    return get_resource(f"ollama-embeddings:{model_name}", create)
+
+# === Shared Async Client (one connection pool per batch) ===
+def create_async_client(concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, base_url=None):
+    return httpx.AsyncClient(
+        base_url=base_url or OLLAMA_BASE_URL,
+        # No pool timeout: callers bound concurrency themselves, waiting for a slot is not a failure
+        timeout=httpx.Timeout(timeout, pool=None),
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    )
+
+# === POST with retry on timeout ===
+async def _post_json(client, path, payload, retries=3, backoff=1.0):
+    for attempt in range(retries + 1):
+        try:
+            response = await client.post(path, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except httpx.TimeoutException:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            print(f"⏳ Ollama {path} timed out, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            await asyncio.sleep(delay)
+
+async def agenerate(client, model_name, prompt, retries=3, backoff=1.0):
+    payload = {"model": model_name, "prompt": prompt, "stream": False, "options": {"num_ctx": CONTEXT_TOKENS}}
+    data = await _post_json(client, "/api/generate", payload, retries=retries, backoff=backoff)
+    return data["response"]
+
+async def aembed(client, model_name, text, retries=3, backoff=1.0):
+    payload = {"model": model_name, "prompt": text}
+    data = await _post_json(client, "/api/embeddings", payload, retries=retries, backoff=backoff)
+    return data["embedding"]
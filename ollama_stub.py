@@ -0,0 +1,109 @@
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# === Local stand-in for the Ollama generate/embeddings API ===
+# Deterministic responses with configurable latency, for exercising the
+# async and batch code paths without a running model.
+
+def stub_embedding(text, dim=64):
+    values = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend(b / 255.0 - 0.5 for b in digest)
+        counter += 1
+    return values[:dim]
+
+def stub_completion(prompt):
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"Stub feedback {digest}: highlight measurable achievements and add missing JD keywords."
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    dim = 64
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "mistral:latest"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        stats = self.server.stats
+        with self.server.stats_lock:
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            self._handle_post()
+        finally:
+            with self.server.stats_lock:
+                stats["in_flight"] -= 1
+
+    def _handle_post(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency)
+
+        if self.path == "/api/embeddings":
+            self._send_json({"embedding": stub_embedding(request.get("prompt", ""), self.dim)})
+        elif self.path == "/api/generate":
+            text = stub_completion(request.get("prompt", ""))
+            if request.get("stream", True):
+                # Ollama streams newline-delimited JSON chunks
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for token in text.split(" "):
+                    chunk = {"model": request.get("model"), "response": token + " ", "done": False}
+                    self.wfile.write((json.dumps(chunk) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write((json.dumps({"model": request.get("model"), "response": "", "done": True}) + "\n").encode("utf-8"))
+            else:
+                self._send_json({"model": request.get("model"), "response": text, "done": True})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.0, dim=64):
+    handler = type("ConfiguredOllamaStubHandler", (OllamaStubHandler,), {"latency": latency, "dim": dim})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    # POST counts and the peak number handled at once, for checking client-side concurrency limits
+    server.stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+    server.stats_lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}"
+    return server, base_url
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a stub Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per request")
+    parser.add_argument("--dim", type=int, default=64, help="Embedding dimension")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.host, args.port, args.latency, args.dim)
+    print(f"✅ Ollama stub listening on {base_url} (set OLLAMA_BASE_URL to use it)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,16 +1,9 @@
 import os
-import pandas as pd
-import PyPDF2
-import docx2txt
-import tkinter as tk
-from tkinter import filedialog
-from scorer import score_resume
-from rag_agent import analyze_resume_with_rag as generate_feedback
-from fpdf import FPDF
-import easyocr
-
-# Initialize EasyOCR reader
-ocr_reader = easyocr.Reader(['en'])
+from text_extractor import extract_text as extract_text_with_ocr
+from batch_ranker import process_batch as run_batch
+from dedup import DEDUP_THRESHOLD
+from ollama_client import DEFAULT_CONCURRENCY
+from report_renderer import save_feedback_pdf
 
 # === Persona-Tailored Query Generator ===
 def generate_persona_prompt(role):
@@ -26,87 +19,27 @@ Focus on:
 
 # === Helper to extract text including scanned resumes ===
 def extract_text(file_path):
-    try:
-        if file_path.endswith(".pdf"):
-            with open(file_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                content = "\n".join(page.extract_text() or "" for page in reader.pages)
-                if not content.strip():
-                    print("🔍 No text found in PDF. Trying OCR with EasyOCR...")
-                    from pdf2image import convert_from_path
-                    pages = convert_from_path(file_path)
-                    content = "\n".join(ocr_reader.readtext(page, detail=0, paragraph=True) for page in pages)
-                    content = "\n".join([line for sublist in content for line in sublist])
-                return content
-        elif file_path.endswith(".docx"):
-            return docx2txt.process(file_path)
-        elif file_path.endswith(".txt"):
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        elif file_path.endswith(('.png', '.jpg', '.jpeg')):
-            content = ocr_reader.readtext(file_path, detail=0, paragraph=True)
-            return "\n".join(content)
-    except Exception as e:
-        print(f"❌ Error reading {file_path}: {e}")
-    return ""
-
-# === Helper to save feedback to PDF ===
-def save_feedback_pdf(resume_name, feedback_text):
-    try:
-        os.makedirs("pdf_feedback", exist_ok=True)
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-
-        pdf.multi_cell(0, 10, f"Resume Feedback for: {resume_name}\n\n")
-        pdf.multi_cell(0, 10, feedback_text)
-
-        output_path = os.path.join("pdf_feedback", f"{resume_name}_feedback.pdf")
-        pdf.output(output_path)
-        print(f"✅ PDF saved: {output_path}")
-    except Exception as e:
-        print(f"❌ Error saving PDF for {resume_name}: {e}")
+    return extract_text_with_ocr(file_path, ocr=True)
 
 # === Load and Rank Resumes ===
-def process_batch(resume_folder, jd_file_path):
-    jd_text = extract_text(jd_file_path)
-    if not jd_text:
-        raise ValueError("Job description could not be extracted.")
-
+def process_batch(resume_folder, jd_file_path, workers=None, concurrency=DEFAULT_CONCURRENCY, use_llm_cache=True,
+                  top_k=None, min_score=None, budget_seconds=None, resume=False, report_mode="pdf",
+                  dedup_threshold=DEDUP_THRESHOLD):
     role = os.path.basename(jd_file_path).split('.')[0] or "this role"
     query = generate_persona_prompt(role)
 
-    all_results = []
-
-    for filename in os.listdir(resume_folder):
-        filepath = os.path.join(resume_folder, filename)
-        if not filename.lower().endswith((".pdf", ".docx", ".txt", ".png", ".jpg", ".jpeg")):
-            continue
-
-        resume_text = extract_text(filepath)
-        if not resume_text:
-            continue
-
-        score, matched_skills = score_resume(resume_text, jd_text)
-        feedback = generate_feedback(resume_text, jd_text, query=query)
-
-        all_results.append({
-            "Resume File": filename,
-            "Match Score": score,
-            "Matched Skills": ", ".join(matched_skills),
-            "Feedback": feedback
-        })
-
-        save_feedback_pdf(filename.split('.')[0], feedback)
-
-    df = pd.DataFrame(all_results)
-    df.to_csv("batch_ranking_results.csv", index=False)
-    print("✅ Batch processing completed. Saved to batch_ranking_results.csv")
-    print(df.head())
-    return df
+    # Same pipeline as batch_ranker, with OCR enabled for scans and images
+    return run_batch(
+        resume_folder, jd_file_path, query=query, ocr=True, workers=workers, concurrency=concurrency,
+        use_llm_cache=use_llm_cache, top_k=top_k, min_score=min_score, budget_seconds=budget_seconds, resume=resume,
+        report_mode=report_mode, dedup_threshold=dedup_threshold,
+    )
 
 # === Main (Dynamic File Dialogs) ===
 if __name__ == '__main__':
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
 
@@ -1,9 +1,15 @@
 # rag_agent.py
 
-from langchain.chains import RetrievalQA
+import os
+import asyncio
+import numpy as np
+from collections import deque
 from langchain.prompts import PromptTemplate
-from langchain_community.llms import Ollama
-from vector_search import create_resume_vector_index
+from llm_cache import acached_generate, cached_generate, cached_stream
+from metrics import incr, span
+from ollama_client import CONTEXT_TOKENS, DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, aembed, agenerate, create_async_client, get_ollama_llm
+from embedding_backends import get_embedding_backend
+from vector_search import create_resume_vector_index, embed_texts, load_cached_embedding, split_resume, store_cached_embedding
 
 # === Custom Prompt Template ===
 rag_prompt = PromptTemplate(
@@ -22,32 +28,235 @@ Respond with a detailed, professional answer.
 """
 )
 
+# === Adaptive Retrieval Settings ===
+# RESUME_RAG_MODE: "adaptive" sends resumes that fit the context budget whole and only indexes
+# longer ones; "retrieval" always chunks and retrieves; "direct" never does (long resumes are cut)
+RAG_MODE = os.environ.get("RESUME_RAG_MODE", "adaptive")
+# Budgets are taken out of CONTEXT_TOKENS (RESUME_CONTEXT_TOKENS), the window ollama_client requests
+RESPONSE_TOKENS = int(os.environ.get("RESUME_RESPONSE_TOKENS", "1024"))  # kept free for the answer
+# Resumes above this many tokens get an index (0: whatever the context budget allows)
+DIRECT_MAX_TOKENS = int(os.environ.get("RESUME_RAG_DIRECT_MAX_TOKENS", "0"))
+CHARS_PER_TOKEN = 4  # rough English-text estimate; avoids loading a tokenizer per call
+MIN_CHUNK_CHARS, MAX_CHUNK_CHARS = 400, 2000
+TARGET_CHUNKS = 8    # retrieved chunks that fill the budget, before clamping the chunk size
+QUERY_ALLOWANCE_TOKENS = 256  # room kept for the question when sizing chunks
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+# Chunk size depends on the context settings only, never on the question, so chunk boundaries
+# (and with them the vector indexes and the chunk-embedding cache) are shared by every query
+_SIZING_BUDGET_TOKENS = max(CONTEXT_TOKENS - RESPONSE_TOKENS - estimate_tokens(rag_prompt.template) - QUERY_ALLOWANCE_TOKENS, 256)
+RETRIEVAL_CHUNK_SIZE = min(max(_SIZING_BUDGET_TOKENS * CHARS_PER_TOKEN // TARGET_CHUNKS, MIN_CHUNK_CHARS), MAX_CHUNK_CHARS)
+
+# Which path recent calls took, newest last; counters rag_direct / rag_retrieval mirror it
+retrieval_log = deque(maxlen=1000)
+
+def plan_retrieval(resume_text, query, mode=None):
+    mode = mode or RAG_MODE
+    budget = max(CONTEXT_TOKENS - RESPONSE_TOKENS - estimate_tokens(rag_prompt.template + query), 256)
+    resume_tokens = estimate_tokens(resume_text)
+    direct_limit = min(DIRECT_MAX_TOKENS or budget, budget)
+    direct = mode == "direct" or (mode == "adaptive" and resume_tokens <= direct_limit)
+
+    # Retrieval: fixed chunk size; k and the context packing follow this query's actual budget
+    return {
+        "path": "direct" if direct else "retrieval",
+        "resume_tokens": resume_tokens,
+        "budget_tokens": budget,
+        "chunk_size": RETRIEVAL_CHUNK_SIZE,
+        "k": max(1, budget * CHARS_PER_TOKEN // RETRIEVAL_CHUNK_SIZE),
+    }
+
+def _record_path(plan, chunks=None, timings=None):
+    incr(f"rag_{plan['path']}")
+    retrieval_log.append({**plan, "chunks": chunks})
+    if timings is not None:
+        timings["retrieval"] = plan["path"]
+
+def _fit_context(ranked_chunks, budget_tokens):
+    # Best chunks first, as many as fit; the splitter can overshoot its chunk size, so count characters
+    budget_chars = budget_tokens * CHARS_PER_TOKEN
+    kept, used = [], 0
+    for chunk in ranked_chunks:
+        if kept and used + len(chunk) + 2 > budget_chars:
+            break
+        kept.append(chunk[:budget_chars])
+        used += len(chunk) + 2
+    return "\n\n".join(kept)
+
+# === Retrieval + prompt rendering ("stuff" chain behaviour) ===
+# Short resumes skip the index and go into the prompt whole; a prebuilt vectorstore forces retrieval
+def build_rag_prompt(resume_text, query, model_name="mistral", vectorstore=None, timings=None):
+    plan = plan_retrieval(resume_text, query, mode="retrieval" if vectorstore is not None else None)
+    if plan["path"] == "direct":
+        _record_path(plan, timings=timings)
+        return rag_prompt.format(context=resume_text[:plan["budget_tokens"] * CHARS_PER_TOKEN], question=query)
+
+    if vectorstore is None:
+        vectorstore = create_resume_vector_index(resume_text, model_name=model_name, chunk_size=plan["chunk_size"])
+    if not vectorstore:
+        raise ValueError("Failed to create vectorstore.")
+
+    with span("rag.retrieve"):
+        docs = vectorstore.similarity_search(query, k=plan["k"])
+    _record_path(plan, chunks=len(docs), timings=timings)
+    return rag_prompt.format(context=_fit_context([doc.page_content for doc in docs], plan["budget_tokens"]), question=query)
+
 # === RAG Agent Function ===
-def analyze_resume_with_rag(resume_text, query, model_name="mistral"):
+# Pass a prebuilt vectorstore to reuse one index across several questions about the same resume
+def analyze_resume_with_rag(resume_text, query, model_name="mistral", use_cache=True, vectorstore=None):
     try:
-        # Step 1: Create vector index
-        vectorstore = create_resume_vector_index(resume_text, model_name=model_name)
-        if not vectorstore:
-            raise ValueError("Failed to create vectorstore.")
-
-        # Step 2: Set up Ollama LLM
-        llm = Ollama(model=model_name)
-
-        # Step 3: Configure Retrieval QA Chain
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            retriever=vectorstore.as_retriever(),
-            chain_type="stuff",
-            chain_type_kwargs={"prompt": rag_prompt}
-        )
+        # Step 1-2: Create vector index, retrieve context and render the prompt
+        prompt = build_rag_prompt(resume_text, query, model_name=model_name, vectorstore=vectorstore)
 
-        # Step 4: Run Query
-        response = qa_chain.run(query)
+        # Step 3: Run Query through Ollama, reusing identical earlier generations
+        llm = get_ollama_llm(model_name)
+        response = cached_generate(prompt, model_name, llm.invoke, use_cache=use_cache)
         return response
 
     except Exception as e:
         return f"❌ RAG Agent Error: {str(e)}"
 
+# === Streaming RAG Agent (yields tokens as Ollama produces them) ===
+# timings, if given, receives ttft_seconds / total_seconds when the stream finishes
+def stream_resume_with_rag(resume_text, query, model_name="mistral", use_cache=True, vectorstore=None, timings=None):
+    try:
+        prompt = build_rag_prompt(resume_text, query, model_name=model_name, vectorstore=vectorstore, timings=timings)
+        llm = get_ollama_llm(model_name)
+        yield from cached_stream(prompt, model_name, llm.stream, use_cache=use_cache, timings=timings)
+    except Exception as e:
+        yield f"❌ RAG Agent Error: {str(e)}"
+
+# === Async RAG Agent (shares one HTTP client across a batch) ===
+# Failures are returned, not raised, so one bad resume doesn't abort the batch; str() gives the
+# same "❌ RAG Agent Error: ..." text the sync agent returns, but callers can tell it from feedback
+class RAGAgentError(Exception):
+    pass
+
+async def _cached_aembed(client, embedding_model, text, retries):
+    vector = load_cached_embedding(embedding_model, text)
+    incr("embed_chunks")
+    if vector is None:
+        with span("embed.request"):
+            vector = await aembed(client, embedding_model, text, retries=retries)
+        store_cached_embedding(embedding_model, text, vector)
+    else:
+        incr("embed_cache_hits")
+    return vector
+
+# embedded: (chunks, chunk_vectors, query_vector) already computed for the whole batch by a local backend;
+# otherwise chunks are embedded here over the shared client with embedding_model (default: model_name).
+# Resumes that fit the context budget skip embedding altogether.
+async def analyze_resume_with_rag_async(resume_text, query, model_name="mistral", client=None, retries=3, use_cache=True,
+                                        embedded=None, embedding_model=None):
+    own_client = client is None
+    if own_client:
+        client = create_async_client()
+    try:
+        plan = plan_retrieval(resume_text, query)
+        if plan["path"] == "direct":
+            _record_path(plan)
+            context = resume_text[:plan["budget_tokens"] * CHARS_PER_TOKEN]
+        else:
+            # Step 1: Embed chunks and the query
+            if isinstance(embedded, Exception):
+                raise embedded
+            if embedded is not None:
+                chunks, chunk_vectors, query_vector = embedded
+            else:
+                chunks = [doc.page_content for doc in split_resume(resume_text, chunk_size=plan["chunk_size"])]
+                embedding_model = embedding_model or model_name
+                with span("rag.embed"):
+                    vectors = await asyncio.gather(*(_cached_aembed(client, embedding_model, text, retries) for text in chunks + [query]))
+                chunk_vectors = np.asarray(vectors[:-1], dtype="float32")
+                query_vector = np.asarray(vectors[-1], dtype="float32")
+            if not chunks:
+                raise ValueError("Failed to create vectorstore.")
+
+            # Step 2: Retrieve the nearest chunks by L2 distance, as FAISS does
+            with span("rag.retrieve"):
+                order = np.argsort(np.linalg.norm(chunk_vectors - query_vector, axis=1))[:plan["k"]]
+            _record_path(plan, chunks=len(order))
+            context = _fit_context([chunks[i] for i in order], plan["budget_tokens"])
+
+        # Step 3: Generate the answer
+        prompt = rag_prompt.format(context=context, question=query)
+        return await acached_generate(
+            prompt, model_name, lambda p: agenerate(client, model_name, p, retries=retries), use_cache=use_cache
+        )
+
+    except Exception as e:
+        return RAGAgentError(f"❌ RAG Agent Error: {str(e)}")
+    finally:
+        if own_client:
+            await client.aclose()
+
+def _embed_batch_locally(resume_texts, query, backend):
+    # Every chunk of every resume that needs retrieval, plus the query, in a few large encode calls
+    plans = [plan_retrieval(resume_text, query) for resume_text in resume_texts]
+    chunk_lists = [
+        [doc.page_content for doc in split_resume(resume_text, chunk_size=plan["chunk_size"])] if plan["path"] == "retrieval" else None
+        for resume_text, plan in zip(resume_texts, plans)
+    ]
+    if all(chunks is None for chunks in chunk_lists):
+        return [None] * len(resume_texts)
+    vectors = embed_texts([chunk for chunks in chunk_lists if chunks for chunk in chunks] + [query], backend)
+    query_vector = vectors[-1]
+
+    embedded = []
+    offset = 0
+    for chunks in chunk_lists:
+        if chunks is None:
+            embedded.append(None)
+            continue
+        embedded.append((chunks, vectors[offset:offset + len(chunks)], query_vector))
+        offset += len(chunks)
+    return embedded
+
+async def _analyze_many(resume_texts, query, model_name, concurrency, timeout, retries, use_cache, budget_seconds, on_result):
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    # Local backends embed the whole batch up front; Ollama embeds per resume alongside generation
+    backend = get_embedding_backend(model_name=model_name)
+    embedded = [None] * len(resume_texts)
+    if not backend.remote:
+        try:
+            with span("rag.embed"):
+                embedded = _embed_batch_locally(resume_texts, query, backend)
+        except Exception as e:
+            embedded = [e] * len(resume_texts)
+    embedding_model = getattr(backend, "model_name", model_name)
+
+    async with create_async_client(concurrency=concurrency, timeout=timeout) as client:
+        deadline = loop.time() + budget_seconds if budget_seconds is not None else None
+
+        async def run_one(index, resume_text):
+            async with semaphore:
+                # Requests still queued when the budget runs out are skipped, not cancelled mid-generation
+                if deadline is not None and loop.time() >= deadline:
+                    feedback = None
+                else:
+                    feedback = await analyze_resume_with_rag_async(
+                        resume_text, query, model_name, client=client, retries=retries, use_cache=use_cache,
+                        embedded=embedded[index], embedding_model=embedding_model,
+                    )
+            if on_result is None:
+                return feedback
+            # Streaming callers get each result as it lands instead of one list at the end
+            on_result(index, feedback)
+
+        return await asyncio.gather(*(run_one(i, text) for i, text in enumerate(resume_texts)))
+
+# === Batch Helper: bounded-concurrency feedback, results in input order ===
+# Resumes whose generation failed get a RAGAgentError instead of feedback text.
+# With budget_seconds set, resumes not started before the budget expires get None;
+# requests start in input order, so pass the best candidates first.
+# With on_result(index, feedback) set, results are handed over as they complete.
+def analyze_resumes_with_rag(resume_texts, query, model_name="mistral", concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, retries=3, use_cache=True, budget_seconds=None, on_result=None):
+    return asyncio.run(_analyze_many(list(resume_texts), query, model_name, concurrency, timeout, retries, use_cache, budget_seconds, on_result))
+
 # === Sample Usage ===
 if __name__ == '__main__':
     resume = """
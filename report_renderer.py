@@ -0,0 +1,184 @@
+import io
+import os
+import zipfile
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor
+from fpdf import FPDF
+from metrics import incr, span
+
+REPORT_DIR = "pdf_feedback"
+COMBINED_REPORT_NAME = "batch_feedback_report.pdf"
+ZIP_REPORT_NAME = "feedback_reports.zip"
+REPORT_MODES = ("pdf", "combined", "zip", "none")
+
+# Rendering processes for large batches (default: CPU count)
+DEFAULT_RENDER_WORKERS = int(os.environ.get("RESUME_RENDER_WORKERS", "0")) or None
+# A report renders in a millisecond or two, so small batches aren't worth starting a pool for
+PARALLEL_RENDER_MIN_ITEMS = 64
+# Reports handed to the pool at a time; bounds the feedback texts and PDFs held in memory
+RENDER_WINDOW_PER_WORKER = 16
+
+# The core PDF fonts are latin-1 only; map common LLM punctuation before falling back to "?"
+_LATIN1_REPLACEMENTS = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"',
+    "–": "-", "—": "-", "•": "-", "…": "...", " ": " ",
+})
+
+def _latin1(text):
+    return str(text).translate(_LATIN1_REPLACEMENTS).encode("latin-1", "replace").decode("latin-1")
+
+def _pdf_bytes(pdf):
+    # fpdf 1.7 returns a latin-1 str here, fpdf2 returns a bytearray
+    data = pdf.output(dest="S")
+    return data.encode("latin-1") if isinstance(data, str) else bytes(data)
+
+def report_filename(resume_name):
+    return f"{resume_name}_feedback.pdf"
+
+def unique_report_names(resume_names):
+    # "alice.pdf" and "alice.docx" would both become "alice"; suffix repeats so reports don't collide
+    seen = {}
+    names = []
+    for name in resume_names:
+        count = seen.get(name, 0) + 1
+        seen[name] = count
+        names.append(name if count == 1 else f"{name}_{count}")
+    return names
+
+# === Single Feedback Report (in memory) ===
+def _add_feedback_page(pdf, resume_name, feedback_text):
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 10, _latin1(f"Resume Feedback for: {resume_name}\n\n"))
+    pdf.multi_cell(0, 10, _latin1(feedback_text))
+
+def _render_pdf(resume_name, feedback_text):
+    try:
+        pdf = FPDF()
+        _add_feedback_page(pdf, resume_name, feedback_text)
+        return _pdf_bytes(pdf)
+    except Exception as e:
+        print(f"❌ Error rendering PDF for {resume_name}: {e}")
+        return None
+
+def _render_item(item):
+    return _render_pdf(*item)
+
+def _count_reports(pdfs):
+    rendered = [pdf_bytes for pdf_bytes in pdfs if pdf_bytes]
+    incr("pdf_reports", len(rendered))
+    incr("pdf_bytes", sum(len(pdf_bytes) for pdf_bytes in rendered))
+
+def render_feedback_pdf(resume_name, feedback_text):
+    with span("pdf.render"):
+        pdf_bytes = _render_pdf(resume_name, feedback_text)
+    _count_reports([pdf_bytes])
+    return pdf_bytes
+
+# === Many Reports on a Worker Pool ===
+def iter_feedback_pdfs(items, workers=DEFAULT_RENDER_WORKERS):
+    # items: any iterable of (resume_name, feedback_text) pairs; yields (resume_name, PDF bytes or None)
+    # in input order as each window of reports is rendered, so callers can write them out as they go
+    items = iter(items)
+    workers = workers or os.cpu_count() or 1
+    window = list(islice(items, PARALLEL_RENDER_MIN_ITEMS))
+    if len(window) < PARALLEL_RENDER_MIN_ITEMS or workers == 1:
+        for item in chain(window, items):
+            with span("pdf.render"):
+                pdf_bytes = _render_item(item)
+            _count_reports([pdf_bytes])
+            yield item[0], pdf_bytes
+        return
+
+    window_size = max(PARALLEL_RENDER_MIN_ITEMS, workers * RENDER_WINDOW_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while window:
+            with span("pdf.render_many"):
+                pdfs = list(pool.map(_render_item, window, chunksize=max(1, len(window) // (workers * 4))))
+            _count_reports(pdfs)
+            yield from zip((name for name, _ in window), pdfs)
+            window = list(islice(items, window_size))
+
+# === Combined, Indexed Batch Report ===
+def render_batch_report(entries, title="Batch Feedback Report"):
+    # entries: dicts with "name", "score" and "feedback", already in rank order
+    try:
+        with span("pdf.render_combined"):
+            pdf = FPDF()
+            pdf.add_page()
+            pdf.set_font("Arial", "B", 16)
+            pdf.cell(0, 12, _latin1(title), ln=1)
+            pdf.set_font("Arial", size=11)
+
+            # Index entries link to each candidate's page, which is only known once it is written
+            links = []
+            for rank, entry in enumerate(entries, start=1):
+                link = pdf.add_link()
+                links.append(link)
+                pdf.cell(0, 8, _latin1(f"{rank}. {entry['name']}  ({float(entry['score']):.2f})"), ln=1, link=link)
+
+            for rank, (entry, link) in enumerate(zip(entries, links), start=1):
+                _add_feedback_page(pdf, f"#{rank} {entry['name']}", entry["feedback"] or "")
+                pdf.set_link(link, page=pdf.page_no())
+            report = _pdf_bytes(pdf)
+        incr("pdf_bytes", len(report))
+        return report
+    except Exception as e:
+        print(f"❌ Error rendering batch report: {e}")
+        return None
+
+def build_report_zip(named_pdfs, file=None):
+    # named_pdfs: (resume_name, pdf_bytes) pairs. Built in memory and returned as bytes,
+    # or written straight into file (a path or file object) as the pairs arrive
+    target = file or io.BytesIO()
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+        for resume_name, pdf_bytes in named_pdfs:
+            if pdf_bytes:
+                archive.writestr(report_filename(resume_name), pdf_bytes)
+    return target.getvalue() if file is None else None
+
+# === Writing reports to disk (CLI) ===
+def _write_bytes(output_path, data):
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def save_feedback_pdf(resume_name, feedback_text, output_dir=REPORT_DIR):
+    pdf_bytes = render_feedback_pdf(resume_name, feedback_text)
+    if pdf_bytes is None:
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = _write_bytes(os.path.join(output_dir, report_filename(resume_name)), pdf_bytes)
+    print(f"✅ PDF saved: {output_path}")
+    return output_path
+
+def write_reports(entries, mode="pdf", output_dir=REPORT_DIR, workers=DEFAULT_RENDER_WORKERS):
+    # mode: one PDF per candidate, a single combined PDF, or a zip of per-candidate PDFs.
+    # entries may be any iterable (e.g. rows streamed from the results CSV); only "combined"
+    # needs them all at once, the other modes write each PDF as soon as it is rendered
+    if mode == "none":
+        return []
+    entries = iter(entries)
+    first = next(entries, None)
+    if first is None:
+        return []
+    entries = chain([first], entries)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if mode == "combined":
+        report = render_batch_report(list(entries))
+        return [_write_bytes(os.path.join(output_dir, COMBINED_REPORT_NAME), report)] if report else []
+
+    pdfs = iter_feedback_pdfs(((entry["name"], entry["feedback"]) for entry in entries), workers=workers)
+    if mode == "zip":
+        output_path = os.path.join(output_dir, ZIP_REPORT_NAME)
+        build_report_zip(pdfs, file=output_path + ".tmp")
+        os.replace(output_path + ".tmp", output_path)
+        return [output_path]
+
+    return [
+        _write_bytes(os.path.join(output_dir, report_filename(name)), pdf_bytes)
+        for name, pdf_bytes in pdfs if pdf_bytes
+    ]
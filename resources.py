@@ -0,0 +1,59 @@
+import sys
+import time
+import threading
+import subprocess
+
+# === Shared, thread-safe registry of lazily created heavy resources ===
+# OCR readers and LLM clients are built on first use (not at import) and then
+# shared by every caller in the process.
+_resources = {}
+_init_seconds = {}
+_lock = threading.RLock()
+
+def get_resource(name, factory):
+    resource = _resources.get(name)
+    if resource is not None:
+        return resource
+
+    with _lock:
+        # Re-check under the lock: another thread may have finished creating it
+        if name not in _resources:
+            start = time.perf_counter()
+            _resources[name] = factory()
+            _init_seconds[name] = time.perf_counter() - start
+        return _resources[name]
+
+def reset_resource(name):
+    with _lock:
+        _resources.pop(name, None)
+        _init_seconds.pop(name, None)
+
+def resource_init_times():
+    with _lock:
+        return dict(_init_seconds)
+
+# === Import-time measurement ===
+def measure_import_time(module_name):
+    # Cold import in a fresh interpreter; -X importtime reports cumulative microseconds per module
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True, text=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module_name:
+            return int(parts[1]) / 1e6
+    return None
+
+# === Main ===
+if __name__ == '__main__':
+    modules = sys.argv[1:] or [
+        "text_extractor", "scorer", "vector_search", "rag_agent",
+        "batch_ranker", "pdf_generator_feedback", "llm_agent",
+    ]
+    for module_name in modules:
+        seconds = measure_import_time(module_name)
+        if seconds is None:
+            print(f"❌ {module_name}: import failed")
+        else:
+            print(f"⏱️ {module_name}: {seconds * 1000:.0f} ms")
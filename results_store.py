@@ -0,0 +1,142 @@
+import os
+import csv
+import heapq
+import time
+import tempfile
+
+# === Streaming Result Writer with checkpoint manifest ===
+# Rows are appended to <base>.partial.csv as soon as each resume finishes and
+# flushed periodically; filenames whose rows have reached disk are listed in
+# <base>.manifest so an interrupted run can pick up where it stopped.
+class ResultWriter:
+    def __init__(self, output_base, columns, resume=False, flush_every=50, flush_seconds=5.0):
+        self.partial_path = output_base + ".partial.csv"
+        self.manifest_path = output_base + ".manifest"
+        self.columns = columns
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.completed = set()
+        self.written = 0
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+        if resume:
+            self.completed = load_manifest(self.manifest_path)
+            self._drop_unconfirmed_rows()
+        else:
+            for path in (self.partial_path, self.manifest_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        is_new = not os.path.exists(self.partial_path)
+        self._csv_file = open(self.partial_path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._csv_file, fieldnames=columns)
+        if is_new:
+            self._writer.writeheader()
+        self._manifest_file = open(self.manifest_path, "a", encoding="utf-8")
+
+    def _drop_unconfirmed_rows(self):
+        # Rows written after the last manifest flush may or may not be complete; keep only confirmed ones
+        if not os.path.exists(self.partial_path):
+            return
+        tmp_path = self.partial_path + ".tmp"
+        with open(self.partial_path, newline="", encoding="utf-8") as src, \
+                open(tmp_path, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.DictReader(src)
+            writer = csv.DictWriter(dst, fieldnames=self.columns)
+            writer.writeheader()
+            seen = set()
+            try:
+                for row in reader:
+                    name = row.get(self.columns[0])
+                    if name in self.completed and name not in seen:
+                        seen.add(name)
+                        writer.writerow(row)
+            except csv.Error:
+                pass  # a torn final row from the crash
+        os.replace(tmp_path, self.partial_path)
+
+    def is_done(self, key):
+        return key in self.completed
+
+    def write(self, row, checkpoint=True):
+        # checkpoint=False rows (failures) reach the CSV but not the manifest, so --resume redoes them
+        self._writer.writerow(row)
+        if checkpoint:
+            self._pending.append(row[self.columns[0]])
+        self.written += 1
+        if len(self._pending) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self._csv_file.flush()
+        os.fsync(self._csv_file.fileno())
+        for key in self._pending:
+            self._manifest_file.write(key + "\n")
+            self.completed.add(key)
+        self._manifest_file.flush()
+        os.fsync(self._manifest_file.fileno())
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._csv_file.close()
+        self._manifest_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return set()
+    with open(manifest_path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+# === External Sort (bounded memory) ===
+def _write_run(rows, run_dir):
+    fd, path = tempfile.mkstemp(dir=run_dir, suffix=".csv")
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerows(rows)
+    return path
+
+def _read_run(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.reader(f)
+
+def external_sort_csv(input_path, output_path, key_column, descending=True, chunk_rows=50000):
+    # Sort chunk_rows rows at a time into temporary runs, then k-way merge them
+    with open(input_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        key_index = columns.index(key_column)
+        sign = -1.0 if descending else 1.0
+
+        def sort_key(row):
+            return sign * float(row[key_index] or 0.0)
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as run_dir:
+            run_paths = []
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    chunk.sort(key=sort_key)
+                    run_paths.append(_write_run(chunk, run_dir))
+                    chunk = []
+            if chunk or not run_paths:
+                chunk.sort(key=sort_key)
+                run_paths.append(_write_run(chunk, run_dir))
+
+            tmp_output = output_path + ".tmp"
+            with open(tmp_output, "w", newline="", encoding="utf-8") as out:
+                writer = csv.writer(out)
+                writer.writerow(columns)
+                for row in heapq.merge(*(_read_run(p) for p in run_paths), key=sort_key):
+                    writer.writerow(row)
+            os.replace(tmp_output, output_path)
+    return output_path
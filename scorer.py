@@ -1,30 +1,77 @@
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from langchain_community.llms import Ollama
-from langchain.prompts import PromptTemplate
+from llm_cache import cached_generate
+from metrics import incr, span
+from skill_matcher import get_skill_matcher
+from ollama_client import get_ollama_llm
 
 # === Resume Scorer ===
 def score_resume(resume_text, jd_text):
     try:
-        # Vectorize text
-        vectorizer = TfidfVectorizer(stop_words='english')
-        vectors = vectorizer.fit_transform([resume_text, jd_text])
+        with span("score.tfidf"):
+            # Vectorize text
+            vectorizer = TfidfVectorizer(stop_words='english')
+            vectors = vectorizer.fit_transform([resume_text, jd_text])
 
-        # Compute cosine similarity
-        similarity = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
+            # Compute cosine similarity
+            similarity = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
+        incr("resumes_scored")
 
-        # Extract matched terms
-        resume_tokens = set(resume_text.lower().split())
-        jd_tokens = set(jd_text.lower().split())
-        matched_skills = list(resume_tokens.intersection(jd_tokens))
+        # Taxonomy skills mentioned by both the JD and the resume
+        matcher = get_skill_matcher()
+        with span("score.skills"):
+            matched_skills = matcher.matched_skills(matcher.match(resume_text), matcher.match(jd_text))
 
         return similarity, matched_skills
     except Exception as e:
         return 0.0, [f"Error in scoring: {e}"]
 
+# === Batch Resume Scorer ===
+def score_resumes(resume_texts, jd_text):
+    resume_texts = list(resume_texts)
+    if not resume_texts:
+        return np.zeros(0), []
+
+    try:
+        with span("score.tfidf"):
+            # One vocabulary and IDF for the whole batch, so scores are comparable
+            vectorizer = TfidfVectorizer(stop_words='english')
+            vectors = vectorizer.fit_transform(resume_texts + [jd_text])
+            resume_vectors = vectors[:-1]
+            jd_vector = vectors[-1]
+
+            # Rows are L2-normalised, so one sparse product gives every cosine similarity
+            scores = np.asarray((resume_vectors @ jd_vector.T).todense()).ravel()
+        incr("resumes_scored", len(resume_texts))
+
+        # The JD's skills are matched once; each resume is a single pass over its tokens
+        matcher = get_skill_matcher()
+        with span("score.skills"):
+            jd_skills = matcher.match(jd_text)
+            matched_skills = [matcher.matched_skills(resume_skills, jd_skills) for resume_skills in matcher.match_many(resume_texts)]
+
+        return scores, matched_skills
+    except Exception as e:
+        return np.zeros(len(resume_texts)), [[f"Error in scoring: {e}"] for _ in resume_texts]
+
+# === Stage-Two Selection ===
+def shortlist_indices(scores, top_k=None, min_score=None):
+    # Indices of resumes that go on to feedback generation, best score first
+    scores = np.asarray(scores)
+    order = np.argsort(-scores, kind="stable")
+    if min_score is not None:
+        order = order[scores[order] >= min_score]
+    if top_k is not None:
+        order = order[:top_k]
+    return order.tolist()
+
 # === Feedback Generator ===
-def generate_feedback(resume_text, jd_text, model_name="mistral"):
+def generate_feedback(resume_text, jd_text, model_name="mistral", use_cache=True):
     try:
+        # Imported here so TF-IDF-only callers don't pay for LangChain at import time
+        from langchain.prompts import PromptTemplate
+
         prompt_template = PromptTemplate(
             input_variables=["resume", "jd"],
             template="""
@@ -42,8 +89,8 @@ Provide clear and concise suggestions in bullet points.
         )
 
         prompt = prompt_template.format(resume=resume_text, jd=jd_text)
-        llm = Ollama(model=model_name)
-        response = llm.invoke(prompt)
+        llm = get_ollama_llm(model_name)
+        response = cached_generate(prompt, model_name, llm.invoke, use_cache=use_cache)
         return response
     except Exception as e:
         return f"❌ Error generating feedback: {e}"
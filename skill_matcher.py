@@ -0,0 +1,123 @@
+import os
+import re
+import json
+from collections import Counter, deque
+from resources import get_resource
+
+# === Skill Taxonomy Settings ===
+# JSON object: canonical skill name -> list of aliases (multi-word phrases allowed)
+DEFAULT_TAXONOMY_PATH = os.environ.get(
+    "RESUME_SKILL_TAXONOMY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
+)
+
+# Tokens keep the punctuation that is part of tech names (c++, c#, node.js, .net) but not the
+# punctuation around them, so "Python," and "python" normalise to the same token. "/" and "-"
+# separate tokens ("Python/Django", "AWS-hosted"); taxonomy phrases go through the same
+# tokenizer, so aliases such as ci/cd, pl/sql and scikit-learn match as multi-token phrases.
+_TOKEN_PATTERN = re.compile(r"\.?[a-z0-9](?:[a-z0-9+#.]*[a-z0-9+#])?")
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower())
+
+def load_taxonomy(path=DEFAULT_TAXONOMY_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# === Token-level Aho-Corasick automaton over skill phrases ===
+# Built once per taxonomy; match() walks each text's tokens in a single pass and
+# reports every phrase ending at each token, multi-word ones included.
+class SkillMatcher:
+    def __init__(self, taxonomy):
+        self.skills = list(taxonomy)
+        self.vocabulary = set()
+        self._goto = [{}]      # state -> {token: next state}
+        self._fail = [0]
+        self._output = [()]    # state -> (skill id, phrase length) for phrases ending here
+
+        for skill_id, skill in enumerate(self.skills):
+            for phrase in [skill, *taxonomy[skill]]:
+                tokens = tokenize(phrase)
+                if tokens:
+                    self._add_phrase(tokens, skill_id)
+        self._build_failure_links()
+
+    def _add_phrase(self, tokens, skill_id):
+        state = 0
+        for token in tokens:
+            self.vocabulary.add(token)
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        entry = (skill_id, len(tokens))
+        if entry not in self._output[state]:
+            self._output[state] = self._output[state] + (entry,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Phrases that are suffixes of this one also end here
+                self._output[next_state] = self._output[next_state] + tuple(
+                    entry for entry in self._output[self._fail[next_state]] if entry not in self._output[next_state]
+                )
+
+    def match_ids(self, text):
+        counts = Counter()
+        last_end = {}  # skill id -> token position where its last counted mention ended
+        goto, fail, output, vocabulary = self._goto, self._fail, self._output, self.vocabulary
+        state = 0
+        for position, token in enumerate(tokenize(text)):
+            if token not in vocabulary:
+                # Most resume words are not skill tokens; they can only send us back to the root
+                state = 0
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for skill_id, length in output[state]:
+                # Overlapping aliases of one skill ("spring" + "spring boot") are a single mention
+                if position - length + 1 > last_end.get(skill_id, -1):
+                    counts[skill_id] += 1
+                last_end[skill_id] = position
+        return counts
+
+    def match(self, text):
+        # Canonical skill -> number of mentions
+        return Counter({self.skills[skill_id]: count for skill_id, count in self.match_ids(text).items()})
+
+    def match_many(self, texts):
+        return [self.match(text) for text in texts]
+
+    def matched_skills(self, resume_skills, jd_skills):
+        # Skills the JD asks for that the resume mentions, most-mentioned first
+        shared = [skill for skill in resume_skills if skill in jd_skills]
+        return sorted(shared, key=lambda skill: (-resume_skills[skill], skill))
+
+# === Shared matcher (compiled on first use) ===
+def get_skill_matcher(path=DEFAULT_TAXONOMY_PATH):
+    return get_resource(f"skill-matcher:{os.path.abspath(path)}", lambda: SkillMatcher(load_taxonomy(path)))
+
+# === Main ===
+if __name__ == '__main__':
+    import sys
+    import time
+
+    matcher = get_skill_matcher()
+    for file_path in sys.argv[1:]:
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+        start = time.perf_counter()
+        skills = matcher.match(text)
+        print(f"🎯 {file_path} ({(time.perf_counter() - start) * 1000:.2f} ms): {dict(skills.most_common())}")
@@ -0,0 +1,46 @@
+import asyncio
+import httpx
+import pytest
+import ollama_client
+from ollama_stub import start_stub_server, stub_completion
+from rag_agent import analyze_resumes_with_rag, rag_prompt
+
+QUERY = "How can this resume be improved?"
+
+@pytest.fixture
+def stub(monkeypatch):
+    servers = []
+
+    def start(latency):
+        server, base_url = start_stub_server(latency=latency)
+        servers.append(server)
+        monkeypatch.setattr(ollama_client, "OLLAMA_BASE_URL", base_url)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_batch_results_keep_input_order_and_concurrency_limit(stub):
+    server = stub(latency=0.05)
+    resumes = [f"Candidate {i}: Python developer with {i} years of SQL and AWS." for i in range(12)]
+
+    results = analyze_resumes_with_rag(resumes, QUERY, concurrency=3, use_cache=False)
+
+    # Short resumes go to the model whole, so each expected answer is known up front
+    assert results == [stub_completion(rag_prompt.format(context=text, question=QUERY)) for text in resumes]
+    assert server.stats["requests"] == len(resumes)
+    assert 1 < server.stats["max_in_flight"] <= 3
+
+def test_post_json_retries_on_timeout(stub):
+    server = stub(latency=0.5)
+
+    async def post():
+        async with ollama_client.create_async_client(timeout=0.1) as client:
+            await ollama_client._post_json(client, "/api/generate", {"model": "mistral", "prompt": "hi", "stream": False},
+                                           retries=2, backoff=0.01)
+
+    with pytest.raises(httpx.TimeoutException):
+        asyncio.run(post())
+    assert server.stats["requests"] == 3
@@ -0,0 +1,37 @@
+import pytest
+from skill_matcher import SkillMatcher, get_skill_matcher, tokenize
+
+@pytest.mark.parametrize("text, expected", [
+    ("Python/Django, AWS/GCP", {"Python", "Django", "AWS", "GCP"}),
+    ("C++/C#, Node.js/React", {"C++", "C#", "Node.js", "React"}),
+    ("Python-based ETL on AWS-hosted Spark", {"Python", "ETL", "AWS", "Spark"}),
+    ("CI/CD pipelines, scikit-learn models, PL/SQL and T-SQL", {"CI/CD", "scikit-learn", "SQL"}),
+    ("Skilled in .NET, node.js and machine-learning.", {".NET", "Node.js", "Machine Learning"}),
+])
+def test_slash_and_hyphen_separated_skills(text, expected):
+    assert set(get_skill_matcher().match(text)) == expected
+
+def test_common_words_are_not_skills():
+    text = "I excel at keeping guard rails on a torch relay: a 5 ml dose, coaching and forecasting for security."
+    assert get_skill_matcher().match(text) == {}
+
+@pytest.mark.parametrize("text, expected", [
+    ("Advanced Excel and MS Excel reporting", {"Microsoft Excel"}),
+    ("iOS Swift with SwiftUI", {"Swift (iOS)"}),
+    ("Ruby on Rails, PyTorch and ML models", {"Ruby", "Ruby on Rails", "PyTorch", "Machine Learning"}),
+])
+def test_qualified_skill_names_still_match(text, expected):
+    assert set(get_skill_matcher().match(text)) == expected
+
+def test_tokens_keep_punctuation_inside_tech_names():
+    assert tokenize("Python, C++/C#; .NET-based node.js!") == ["python", "c++", "c#", ".net", "based", "node.js"]
+
+def test_overlapping_aliases_count_once():
+    matcher = SkillMatcher({"Spring": ["spring", "spring boot"], "CI/CD": ["ci/cd", "continuous integration"]})
+    assert matcher.match("Spring Boot and CI/CD; later more Spring") == {"Spring": 2, "CI/CD": 1}
+
+def test_matched_skills_orders_by_mentions():
+    matcher = get_skill_matcher()
+    resume = matcher.match("Python, SQL, Python and AWS")
+    jd = matcher.match("Needs AWS and Python")
+    assert matcher.matched_skills(resume, jd) == ["Python", "AWS"]
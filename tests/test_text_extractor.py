@@ -0,0 +1,24 @@
+import fitz
+import numpy as np
+import text_extractor
+
+def _blank_pdf(pages):
+    with fitz.open() as doc:
+        for _ in range(pages):
+            doc.new_page()
+        return doc.tobytes()
+
+def test_rasterize_failure_is_a_page_error(monkeypatch):
+    def rasterize(page, dpi):
+        if page.number == 0:
+            raise RuntimeError("bad page")
+        return np.zeros((1, 1, 3), dtype=np.uint8)
+
+    monkeypatch.setattr(text_extractor, "_rasterize", rasterize)
+    monkeypatch.setattr(text_extractor, "_ocr_image", lambda image: ("second page", 0.0))
+    texts, reports = text_extractor.extract_pdf_pages(_blank_pdf(2), ocr=True, max_pages_in_memory=1)
+
+    # The other page is still OCR'd; the failed one is reported, so the result isn't cached
+    assert texts == ["", "second page"]
+    assert reports[0]["error"] == "bad page"
+    assert "error" not in reports[1]
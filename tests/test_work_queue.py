@@ -0,0 +1,125 @@
+import time
+import pytest
+from scorer import score_resumes
+from work_queue import WorkQueue
+
+JD_TEXT = "Data engineer with Python, SQL and AWS experience building Spark pipelines."
+RESUMES = [
+    "Python and SQL developer. Built Spark pipelines on AWS.",
+    "Java backend engineer working with Spring and Oracle.",
+    "Data engineer: Python, Spark, Airflow, AWS, SQL warehouses.",
+]
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite3"))
+    queue.configure(jd_text=JD_TEXT, query="Improve it", ocr=False, top_k=2, min_score=None)
+    queue.enqueue([f"/resumes/r{i}.txt" for i in range(len(RESUMES))])
+    yield queue
+    queue.close()
+
+def test_enqueue_is_idempotent(queue):
+    assert queue.enqueue(["/resumes/r0.txt", "/resumes/new.txt"]) == 1
+    assert queue.counts() == {"extract": 4}
+
+def test_live_lease_is_exclusive(queue):
+    state, jobs = queue.lease("a", limit=10, lease_seconds=60)
+    assert state == "extract"
+    assert [path for _, path, _ in jobs] == [f"/resumes/r{i}.txt" for i in range(3)]
+    assert queue.lease("b", limit=10, lease_seconds=60) == (None, [])
+
+def test_expired_lease_is_released_and_late_result_dropped(queue):
+    _, jobs = queue.lease("dead", limit=1, lease_seconds=0.05)
+    job_id = jobs[0][0]
+    time.sleep(0.1)
+
+    _, jobs = queue.lease("alive", limit=1, lease_seconds=60)
+    assert jobs[0][0] == job_id
+
+    # The first worker wakes up after losing its lease; its result must not land
+    assert not queue.complete_extract("dead", job_id, "stale text")
+    assert queue.complete_extract("alive", job_id, RESUMES[0])
+    assert queue.counts() == {"extract": 2, "extracted": 1}
+
+def test_release_makes_jobs_available_again(queue):
+    _, jobs = queue.lease("a", limit=1, lease_seconds=60)
+    queue.release("a", [jobs[0][0]], RuntimeError("ollama down"))
+    _, again = queue.lease("b", limit=1, lease_seconds=60)
+    assert again[0][0] == jobs[0][0]
+
+def test_release_with_retry_after_holds_the_job_back(queue):
+    _, jobs = queue.lease("a", limit=1, lease_seconds=60, max_attempts=1)
+    queue.release("a", [jobs[0][0]], RuntimeError("ollama down"), retry_after=0.05)
+    _, other = queue.lease("b", limit=1, lease_seconds=60, max_attempts=1)
+    assert other[0][1] == "/resumes/r1.txt"
+
+    # Out of attempts once the pause is over: the job fails with the generation error, not "lease expired"
+    time.sleep(0.1)
+    queue.lease("b", limit=1, lease_seconds=60, max_attempts=1)
+    assert queue.failures() == [("/resumes/r0.txt", "ollama down")]
+
+def test_job_fails_after_max_attempts(queue):
+    for _ in range(2):
+        _, jobs = queue.lease("crashy", limit=1, lease_seconds=0.01, max_attempts=2)
+        assert jobs[0][1] == "/resumes/r0.txt"
+        time.sleep(0.05)
+
+    _, jobs = queue.lease("next", limit=1, lease_seconds=60, max_attempts=2)
+    assert jobs[0][1] == "/resumes/r1.txt"
+    assert queue.failures() == [("/resumes/r0.txt", "lease expired")]
+
+def test_shortlist_uses_one_shared_fit(queue):
+    _, jobs = queue.lease("a", limit=10, lease_seconds=60)
+    for (job_id, _, _), text in zip(jobs, RESUMES):
+        queue.complete_extract("a", job_id, text)
+
+    # The first lease after the last extraction scores the batch and promotes the top 2
+    state, jobs = queue.lease("a", limit=10, lease_seconds=60)
+    assert state == "feedback"
+    assert [text for _, _, text in jobs] == [RESUMES[0], RESUMES[2]]
+    for job_id, _, _ in jobs:
+        queue.complete_feedback("a", job_id, "Looks good")
+
+    assert queue.finished()
+    expected, _ = score_resumes(RESUMES, JD_TEXT)
+    results = queue.results()
+    assert [score for _, score, _, _, _, _ in results] == pytest.approx(expected.tolist())
+    assert [stage for _, _, _, stage, _, _ in results] == ["feedback", "score-only", "feedback"]
+
+def test_near_duplicates_share_the_representative_feedback(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite3"))
+    queue.configure(jd_text=JD_TEXT, query="Improve it", ocr=False, top_k=1, min_score=None, dedup_threshold=0.9)
+    texts = [RESUMES[1], RESUMES[2], RESUMES[2] + " ", RESUMES[0]]
+    queue.enqueue([f"/resumes/d{i}.txt" for i in range(len(texts))])
+    _, jobs = queue.lease("a", limit=10, lease_seconds=60)
+    for (job_id, _, _), text in zip(jobs, texts):
+        queue.complete_extract("a", job_id, text)
+
+    # top_k counts clusters: only the representative of d1/d2 is leased for feedback
+    state, jobs = queue.lease("a", limit=10, lease_seconds=60)
+    assert (state, [path for _, path, _ in jobs]) == ("feedback", ["/resumes/d1.txt"])
+    assert not queue.finished()
+    queue.complete_feedback("a", jobs[0][0], "Looks good")
+
+    assert queue.finished()
+    results = {path: (score, stage, feedback, cluster) for path, score, _, stage, feedback, cluster in queue.results()}
+    assert results["/resumes/d2.txt"] == results["/resumes/d1.txt"]
+    assert results["/resumes/d2.txt"][1:] == ("feedback", "Looks good", "/resumes/d1.txt")
+    assert results["/resumes/d0.txt"][1:] == ("score-only", "", None)
+    queue.close()
+
+def test_promotion_claim_is_exclusive_and_expires(queue):
+    _, jobs = queue.lease("a", limit=10, lease_seconds=60)
+    for (job_id, _, _), text in zip(jobs, RESUMES):
+        queue.complete_extract("a", job_id, text)
+
+    # "a" claims the scoring pass and stalls; nobody else scores until its claim expires
+    with queue._transaction() as conn:
+        assert queue._claim_promotion(conn, "a", time.time(), 0.05)
+    assert queue.lease("b", limit=10, lease_seconds=60) == (None, [])
+    time.sleep(0.1)
+
+    state, _ = queue.lease("b", limit=10, lease_seconds=60)
+    assert state == "feedback"
+    queue._promote_shortlist("a")
+    assert queue.counts() == {"feedback": 2, "done": 1}
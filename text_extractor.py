@@ -0,0 +1,251 @@
+import io
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import docx2txt
+import fitz  # PyMuPDF
+from disk_cache import CACHE_DIR, DiskCache, hash_key
+from metrics import incr, metrics, span
+from resources import get_resource
+
+# Bump whenever extraction output changes so stale cache entries are ignored
+EXTRACTOR_VERSION = "2"
+
+TEXT_EXTENSIONS = (".pdf", ".docx", ".txt")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# === Page-level OCR settings ===
+OCR_DPI = int(os.environ.get("RESUME_OCR_DPI", "200"))
+OCR_WORKERS = int(os.environ.get("RESUME_OCR_WORKERS", "2"))
+# Rasterised pages held in memory at once (being OCR'd or waiting for a worker)
+OCR_MAX_PAGES_IN_MEMORY = int(os.environ.get("RESUME_OCR_MAX_PAGES_IN_MEMORY", "4"))
+
+text_cache = DiskCache(
+    os.path.join(CACHE_DIR, "extracted_text"),
+    max_bytes=int(os.environ.get("RESUME_TEXT_CACHE_MB", "256")) * 1024 * 1024,
+    suffix=".txt",
+)
+
+# === Lazily created EasyOCR reader (loading the model is expensive) ===
+def get_ocr_reader():
+    def create():
+        import easyocr
+        return easyocr.Reader(['en'])
+    return get_resource("easyocr:en", create)
+
+# === Format-specific extractors ===
+def _rasterize(page, dpi):
+    import numpy as np
+
+    pix = page.get_pixmap(dpi=dpi)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+def _ocr_image(image):
+    start = time.perf_counter()
+    with span("ocr.page"):
+        lines = get_ocr_reader().readtext(image, detail=0, paragraph=True)
+    return "\n".join(lines), time.perf_counter() - start
+
+def extract_pdf_pages(data, ocr=False, dpi=OCR_DPI, workers=OCR_WORKERS, max_pages_in_memory=OCR_MAX_PAGES_IN_MEMORY):
+    # Returns (page_texts, page_reports). Pages with a text layer are read directly;
+    # only pages without one are rasterised (one at a time) and OCR'd on a thread pool.
+    texts = []
+    reports = []
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        needs_ocr = []
+        for page in doc:
+            start = time.perf_counter()
+            text = page.get_text()
+            texts.append(text)
+            reports.append({"page": page.number + 1, "method": "text", "seconds": time.perf_counter() - start, "chars": len(text)})
+            if ocr and not text.strip():
+                needs_ocr.append(page.number)
+        incr("extract_pages", len(texts))
+
+        if not needs_ocr:
+            return texts, reports
+
+        print(f"🔍 {len(needs_ocr)} of {len(texts)} pages have no text layer. Running OCR with EasyOCR...")
+        incr("ocr_pages", len(needs_ocr))
+        slots = threading.BoundedSemaphore(max_pages_in_memory)
+        futures = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for number in needs_ocr:
+                # Block rasterising further pages until an in-flight one has been OCR'd
+                slots.acquire()
+                start = time.perf_counter()
+                try:
+                    with span("ocr.rasterize"):
+                        image = _rasterize(doc[number], dpi)
+                except Exception as e:
+                    # Same as a failed OCR: the page stays empty and the result is marked incomplete
+                    slots.release()
+                    reports[number].update(method="ocr", error=str(e) or type(e).__name__)
+                    print(f"❌ Rasterising page {number + 1} failed: {reports[number]['error']}")
+                    continue
+                raster_seconds = time.perf_counter() - start
+                future = pool.submit(_ocr_image, image)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append((number, raster_seconds, future))
+                del image
+
+            for number, raster_seconds, future in futures:
+                report = reports[number]
+                report["method"] = "ocr"
+                report["raster_seconds"] = raster_seconds
+                try:
+                    texts[number], ocr_seconds = future.result()
+                    report["ocr_seconds"] = ocr_seconds
+                except Exception as e:
+                    report["error"] = str(e) or type(e).__name__
+                    ocr_seconds = 0.0
+                report["seconds"] += raster_seconds + ocr_seconds
+                report["chars"] = len(texts[number])
+                if "error" in report:
+                    print(f"❌ OCR page {number + 1} failed: {report['error']}")
+                else:
+                    print(f"🔍 OCR page {number + 1}: {report['seconds']:.2f}s ({report['chars']} chars)")
+
+    return texts, reports
+
+def _extract(data, ext, ocr, report=None):
+    # Returns (text, complete); incomplete text (a page failed OCR) is used but not cached
+    if ext == ".pdf":
+        texts, page_reports = extract_pdf_pages(data, ocr=ocr)
+        if report is not None:
+            report.extend(page_reports)
+        return "\n".join(texts), not any("error" in page_report for page_report in page_reports)
+    elif ext == ".docx":
+        return docx2txt.process(io.BytesIO(data)), True
+    elif ocr and ext in IMAGE_EXTENSIONS:
+        incr("ocr_pages")
+        with span("ocr.page"):
+            return "\n".join(get_ocr_reader().readtext(data, detail=0, paragraph=True)), True
+    return "", True
+
+# === Cached extraction entry points ===
+# Pass a list as report to collect per-page timings (a single "cache" entry on a hit)
+def extract_text_from_bytes(data, filename, ocr=False, report=None):
+    ext = os.path.splitext(filename)[1].lower()
+    incr("extract_files")
+    incr("extract_bytes", len(data))
+    if ext == ".txt":
+        # Plain text is cheaper to decode than to look up
+        try:
+            text = data.decode("utf-8")
+            incr("extract_chars", len(text))
+            return text
+        except UnicodeDecodeError as e:
+            print(f"❌ Error reading {filename}: {e}")
+            return ""
+
+    key = hash_key(EXTRACTOR_VERSION, ext, "ocr" if ocr else "text", data)
+
+    start = time.perf_counter()
+    cached = text_cache.get(key)
+    if cached is not None:
+        if report is not None:
+            report.append({"page": None, "method": "cache", "seconds": time.perf_counter() - start, "chars": len(cached)})
+        incr("extract_cache_hits")
+        text = cached.decode("utf-8")
+        incr("extract_chars", len(text))
+        return text
+
+    try:
+        with span("extract" + ext):
+            content, complete = _extract(data, ext, ocr, report)
+    except Exception as e:
+        print(f"❌ Error reading {filename}: {e}")
+        return ""
+
+    incr("extract_chars", len(content))
+    if complete:
+        text_cache.set(key, content.encode("utf-8"))
+    else:
+        # Otherwise a transient OCR failure would stick until EXTRACTOR_VERSION changes
+        print(f"❌ {filename}: some pages failed OCR; text not cached so the next run retries them")
+    return content
+
+def extract_text(file_path, ocr=False, report=None):
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        print(f"❌ Error reading {file_path}: {e}")
+        return ""
+    return extract_text_from_bytes(data, file_path, ocr=ocr, report=report)
+
+# === Parallel ingestion stage ===
+DEFAULT_WORKERS = int(os.environ.get("RESUME_INGEST_WORKERS", "0")) or os.cpu_count() or 1
+# Every OCR process loads its own EasyOCR model, so the default is capped when OCR is on
+OCR_INGEST_WORKERS = int(os.environ.get("RESUME_OCR_INGEST_WORKERS", "2"))
+MAX_POOL_RESTARTS = 2
+
+def _extract_job(file_path, ocr, collect_metrics=False):
+    if not collect_metrics:
+        return extract_text(file_path, ocr=ocr), None
+
+    # Worker processes record into their own registry; the snapshot rides back with the text
+    metrics.enabled = True
+    metrics.reset()
+    text = extract_text(file_path, ocr=ocr)
+    return text, metrics.snapshot()
+
+def _extract_isolated(file_path, ocr):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_extract_job, file_path, ocr, metrics.enabled).result()
+
+def iter_extracted(file_paths, ocr=False, workers=None):
+    # Yields (index, file_path, text, error) as each extraction finishes;
+    # callers use index to restore the input order. An explicit workers overrides the OCR cap.
+    workers = workers or (min(DEFAULT_WORKERS, OCR_INGEST_WORKERS) if ocr else DEFAULT_WORKERS)
+    if workers <= 1:
+        for index, file_path in enumerate(file_paths):
+            try:
+                yield index, file_path, extract_text(file_path, ocr=ocr), None
+            except Exception as e:
+                yield index, file_path, "", str(e)
+        return
+
+    # A worker that dies hard (segfault, OOM kill) breaks the whole pool and fails every pending
+    # future with it, so unfinished files go to a fresh pool; if that keeps happening they are
+    # extracted one per pool, where a crash can only be blamed on that one file
+    pending = list(enumerate(file_paths))
+    restarts = 0
+    while pending and restarts <= MAX_POOL_RESTARTS:
+        finished = set()
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(_extract_job, file_path, ocr, metrics.enabled): (index, file_path)
+                    for index, file_path in pending
+                }
+                for future in as_completed(futures):
+                    index, file_path = futures[future]
+                    try:
+                        text, worker_metrics = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        finished.add(index)
+                        yield index, file_path, "", str(e) or type(e).__name__
+                        continue
+                    metrics.merge(worker_metrics)
+                    finished.add(index)
+                    yield index, file_path, text, None
+            pending = []
+        except BrokenProcessPool:
+            restarts += 1
+            incr("extract_pool_restarts")
+            pending = [(index, file_path) for index, file_path in pending if index not in finished]
+            print(f"❌ An extraction worker crashed; retrying {len(pending)} unfinished files in a new pool")
+
+    for index, file_path in pending:
+        try:
+            text, worker_metrics = _extract_isolated(file_path, ocr)
+            metrics.merge(worker_metrics)
+            yield index, file_path, text, None
+        except Exception as e:
+            yield index, file_path, "", str(e) or type(e).__name__
@@ -1,11 +1,13 @@
-import os
+import hashlib
 import streamlit as st
-import fitz  # PyMuPDF
-import docx2txt
-import tempfile
-from scorer import score_resume
-from rag_agent import analyze_resume_with_rag
-from pdf_generator_feedback import save_feedback_pdf
+from scorer import score_resume, score_resumes, shortlist_indices
+from rag_agent import RETRIEVAL_CHUNK_SIZE, RAGAgentError, analyze_resumes_with_rag, plan_retrieval, stream_resume_with_rag
+from report_renderer import (
+    COMBINED_REPORT_NAME, ZIP_REPORT_NAME, build_report_zip, render_batch_report, render_feedback_pdf,
+    report_filename, unique_report_names,
+)
+from text_extractor import extract_text_from_bytes
+from vector_search import create_resume_vector_index
 
 # === Helper: Generate persona prompt for RAG ===
 def generate_persona_prompt(role):
@@ -19,25 +21,67 @@ Focus on:
 - Alignment with role expectations
 """
 
+# === Rerun-safe memoization ===
+# Streamlit re-executes this script on every interaction, so every expensive step
+# is keyed by the uploaded file's content hash. Arguments with a leading underscore
+# are not hashed by Streamlit; the explicit digest stands in for them.
+def file_digest(uploaded_file):
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _extract_cached(digest, filename, _file_bytes):
+    text = extract_text_from_bytes(_file_bytes, filename)
+    if not text:
+        # st.cache_data doesn't cache exceptions, so a failed extraction is retried on the next rerun
+        raise ValueError(f"No text could be extracted from {filename}.")
+    return text
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _score_cached(resume_digest, jd_digest, _resume_text, _jd_text):
+    return score_resume(_resume_text, _jd_text)
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _vector_index_cached(resume_digest, _resume_text):
+    return create_resume_vector_index(_resume_text, chunk_size=RETRIEVAL_CHUNK_SIZE)
+
+def session_cache(name):
+    return st.session_state.setdefault(name, {})
+
 # === Helper: Extract text from uploaded files ===
 def extract_text(uploaded_file):
     try:
-        if uploaded_file.type == "application/pdf":
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(uploaded_file.read())
-                tmp_path = tmp.name
-            with fitz.open(tmp_path) as doc:
-                return "\n".join([page.get_text() for page in doc])
-        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-                tmp.write(uploaded_file.read())
-                tmp_path = tmp.name
-            return docx2txt.process(tmp_path)
-        elif uploaded_file.type == "text/plain":
-            return uploaded_file.read().decode("utf-8")
-    except Exception as e:
-        st.error(f"Text extraction error: {e}")
-    return None
+        return _extract_cached(file_digest(uploaded_file), uploaded_file.name, uploaded_file.getvalue())
+    except ValueError:
+        return None
+
+# === Helper: show a RAG answer, streamed on first ask and memoized per (resume, question) ===
+def show_rag_answer(resume_text, query):
+    resume_digest = text_digest(resume_text)
+    answers = session_cache("rag_answers")
+    key = (resume_digest, text_digest(query))
+    if key in answers:
+        st.write(answers[key])
+        return answers[key]
+
+    # Resumes that fit the context go to the model whole; longer ones get one vector index,
+    # shared by every question asked about them
+    plan = plan_retrieval(resume_text, query)
+    vectorstore = None
+    if plan["path"] == "retrieval":
+        with st.spinner("Indexing resume..."):
+            vectorstore = _vector_index_cached(resume_digest, resume_text)
+
+    timings = {}
+    answer = st.write_stream(stream_resume_with_rag(resume_text, query, vectorstore=vectorstore, timings=timings))
+    if timings.get("ttft_seconds") is not None:
+        source = "whole resume" if timings.get("retrieval") == "direct" else "retrieved sections"
+        st.caption(f"First token after {timings['ttft_seconds']:.1f}s, full answer in {timings['total_seconds']:.1f}s ({source})")
+    if not answer.startswith("❌"):
+        answers[key] = answer  # failures aren't pinned; the next rerun retries
+    return answer
 
 # === Page Setup ===
 st.set_page_config(page_title="Resume Analyzer & Ranker", layout="wide")
@@ -61,29 +105,33 @@ with tab1:
             resume_text = extract_text(resume_file)
             jd_text = extract_text(jd_file)
 
-            if resume_text and jd_text:
-                role = jd_file.name.split(".")[0] or "this role"
-                persona_prompt = generate_persona_prompt(role)
+        if resume_text and jd_text:
+            role = jd_file.name.split(".")[0] or "this role"
+            persona_prompt = generate_persona_prompt(role)
 
-                score, matched_skills = score_resume(resume_text, jd_text)
-                feedback = analyze_resume_with_rag(resume_text, persona_prompt)
+            score, matched_skills = _score_cached(text_digest(resume_text), text_digest(jd_text), resume_text, jd_text)
 
-                st.subheader("Match Score")
-                st.metric("Score", f"{score:.2f} / 1.0")
+            st.subheader("Match Score")
+            st.metric("Score", f"{score:.2f} / 1.0")
 
-                st.subheader("Matched Skills")
-                st.write(matched_skills or "No relevant skills matched.")
+            st.subheader("Matched Skills")
+            st.write(matched_skills or "No relevant skills matched.")
 
-                st.subheader("AI Feedback")
-                st.write(feedback)
+            # Feedback streams in token by token below the score
+            st.subheader("AI Feedback")
+            feedback = show_rag_answer(resume_text, persona_prompt)
 
-                resume_name = resume_file.name.split(".")[0]
-                save_feedback_pdf(resume_name, feedback)
+            # Rendered in memory once per feedback text and served straight from the session
+            resume_name = resume_file.name.split(".")[0]
+            feedback_pdfs = session_cache("feedback_pdfs")
+            pdf_key = (resume_name, text_digest(feedback))
+            if pdf_key not in feedback_pdfs:
+                feedback_pdfs[pdf_key] = render_feedback_pdf(resume_name, feedback)
 
-                with open(f"pdf_feedback/{resume_name}_feedback.pdf", "rb") as f:
-                    st.download_button("Download Feedback PDF", f, file_name=f"{resume_name}_feedback.pdf")
-            else:
-                st.error("Text extraction failed from one of the files.")
+            if feedback_pdfs[pdf_key]:
+                st.download_button("Download Feedback PDF", feedback_pdfs[pdf_key], file_name=report_filename(resume_name))
+        else:
+            st.error("Text extraction failed from one of the files.")
 
 # === Tab 2: Free-Form RAG Q&A ===
 with tab2:
@@ -95,10 +143,8 @@ with tab2:
     if resume_file and query:
         resume_text = extract_text(resume_file)
         if resume_text:
-            with st.spinner("Generating AI response..."):
-                rag_response = analyze_resume_with_rag(resume_text, query)
-                st.subheader("AI Response")
-                st.write(rag_response)
+            st.subheader("AI Response")
+            show_rag_answer(resume_text, query)
         else:
             st.error("Failed to extract text from the resume.")
 
@@ -109,50 +155,135 @@ with tab3:
     uploaded_resumes = st.file_uploader("Upload Resumes", type=["pdf", "docx", "txt"], accept_multiple_files=True)
     uploaded_jd = st.file_uploader("Upload JD File", type=["pdf", "docx", "txt"], key="jd_batch")
 
-    if uploaded_resumes and uploaded_jd and st.button("Start Batch Ranking"):
-        with st.spinner("Processing resumes..."):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        feedback_top_k = st.number_input("AI feedback for top K resumes (0 = all)", min_value=0, value=10, step=1)
+    with col2:
+        feedback_min_score = st.slider("Minimum score for AI feedback", 0.0, 1.0, 0.0, 0.01)
+    with col3:
+        feedback_budget = st.number_input("Feedback time budget in seconds (0 = none)", min_value=0, value=0, step=30)
+
+    # Results live in session state so reruns (e.g. a download click) redraw them instead of recomputing
+    batch_runs = session_cache("batch_runs")
+    batch_key = None
+    if uploaded_resumes and uploaded_jd:
+        batch_key = (
+            file_digest(uploaded_jd),
+            tuple(file_digest(f) for f in uploaded_resumes),
+            feedback_top_k, feedback_min_score, feedback_budget,
+        )
+
+    fresh_run = False
+    if batch_key and st.button("Start Batch Ranking") and batch_key not in batch_runs:
+        with st.spinner("Scoring resumes..."):
             jd_text = extract_text(uploaded_jd)
             role = uploaded_jd.name.split(".")[0] or "this role"
             persona_prompt = generate_persona_prompt(role)
 
-            batch_results = []
+            resume_names = []
+            resume_texts = []
             for resume_file in uploaded_resumes:
                 resume_text = extract_text(resume_file)
                 if not resume_text:
                     continue
 
-                score, matched_skills = score_resume(resume_text, jd_text)
-                feedback = analyze_resume_with_rag(resume_text, persona_prompt)
-
-                resume_name = resume_file.name.split(".")[0]
-                save_feedback_pdf(resume_name, feedback)
-
-                batch_results.append({
-                    "name": resume_name,
-                    "score": score,
-                    "skills": matched_skills,
-                    "feedback": feedback
-                })
-
-            # Sort and rank
-            batch_results.sort(key=lambda x: x["score"], reverse=True)
-
-            for rank, result in enumerate(batch_results, start=1):
-                st.markdown(f"### Rank {rank}: {result['name']}")
-                st.metric("Score", f"{result['score']:.2f} / 1.0")
-
-                st.markdown("**Matched Skills:**")
-                st.write(result["skills"] or "No relevant skills matched.")
-
-                st.markdown("**AI Feedback:**")
-                st.write(result["feedback"])
-
-                pdf_path = f"pdf_feedback/{result['name']}_feedback.pdf"
-                if os.path.exists(pdf_path):
-                    with open(pdf_path, "rb") as f:
-                        st.download_button(
-                            label=f"Download Feedback for {result['name']}",
-                            data=f,
-                            file_name=os.path.basename(pdf_path),
-                            key=f"download_{result['name']}"
-                        )
+                resume_names.append(resume_file.name.split(".")[0])
+                resume_texts.append(resume_text)
+            resume_names = unique_report_names(resume_names)
+
+            # Score all uploads in one pass against a shared vocabulary
+            scores, matched_skills = score_resumes(resume_texts, jd_text)
+
+        # Only the shortlist goes on to LLM feedback; the rest are ranked by score alone
+        shortlist = shortlist_indices(scores, top_k=feedback_top_k or None, min_score=feedback_min_score or None)
+        shortlisted = set(shortlist)
+
+        # Show the ranking as soon as scores are known; feedback slots fill in as each one finishes
+        batch_results = [
+            {"name": name, "score": score, "skills": skills, "feedback": None, "error": None, "pdf": None, "index": i}
+            for i, (name, score, skills) in enumerate(zip(resume_names, scores, matched_skills))
+        ]
+        batch_results.sort(key=lambda x: x["score"], reverse=True)
+
+        slots = {}
+        for rank, result in enumerate(batch_results, start=1):
+            st.markdown(f"### Rank {rank}: {result['name']}")
+            st.metric("Score", f"{result['score']:.2f} / 1.0")
+
+            st.markdown("**Matched Skills:**")
+            st.write(result["skills"] or "No relevant skills matched.")
+
+            st.markdown("**AI Feedback:**")
+            feedback_slot = st.empty()
+            if result["index"] in shortlisted:
+                feedback_slot.info("⏳ Generating feedback...")
+            else:
+                feedback_slot.write("Not generated (outside the feedback shortlist).")
+            slots[result["index"]] = (result, feedback_slot, st.empty())
+
+        def show_feedback(position, feedback):
+            result, feedback_slot, download_slot = slots[shortlist[position]]
+            if isinstance(feedback, RAGAgentError):
+                # No report for a failed generation
+                result["error"] = str(feedback)
+                feedback_slot.error(result["error"])
+                return
+            result["feedback"] = feedback
+            feedback_slot.write(feedback or "Not generated (feedback time budget exhausted).")
+            if feedback:
+                result["pdf"] = render_feedback_pdf(result["name"], feedback)
+            if result["pdf"]:
+                download_slot.download_button(
+                    label=f"Download Feedback for {result['name']}",
+                    data=result["pdf"],
+                    file_name=report_filename(result["name"]),
+                    key=f"download_live_{result['name']}"
+                )
+
+        analyze_resumes_with_rag(
+            [resume_texts[i] for i in shortlist], persona_prompt,
+            budget_seconds=feedback_budget or None, on_result=show_feedback,
+        )
+        batch_runs[batch_key] = batch_results
+        fresh_run = True
+
+    if batch_key in batch_runs and not fresh_run:
+        for rank, result in enumerate(batch_runs[batch_key], start=1):
+            st.markdown(f"### Rank {rank}: {result['name']}")
+            st.metric("Score", f"{result['score']:.2f} / 1.0")
+
+            st.markdown("**Matched Skills:**")
+            st.write(result["skills"] or "No relevant skills matched.")
+
+            st.markdown("**AI Feedback:**")
+            if result["error"]:
+                st.error(result["error"])
+            else:
+                st.write(result["feedback"] or "Not generated (outside the feedback shortlist).")
+
+            if result["pdf"]:
+                st.download_button(
+                    label=f"Download Feedback for {result['name']}",
+                    data=result["pdf"],
+                    file_name=report_filename(result["name"]),
+                    key=f"download_{result['name']}"
+                )
+
+    # Whole-batch downloads, built in memory from the per-candidate reports
+    if batch_key in batch_runs:
+        with_feedback = [result for result in batch_runs[batch_key] if result["feedback"]]
+        if with_feedback:
+            batch_reports = session_cache("batch_reports")
+            if batch_key not in batch_reports:
+                batch_reports[batch_key] = (
+                    render_batch_report(with_feedback),
+                    build_report_zip((result["name"], result["pdf"]) for result in with_feedback),
+                )
+            combined_pdf, reports_zip = batch_reports[batch_key]
+
+            col1, col2 = st.columns(2)
+            with col1:
+                if combined_pdf:
+                    st.download_button("Download Combined Report (PDF)", combined_pdf, file_name=COMBINED_REPORT_NAME, key="download_combined")
+            with col2:
+                st.download_button("Download All Reports (ZIP)", reports_zip, file_name=ZIP_REPORT_NAME, key="download_zip")
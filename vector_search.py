@@ -1,22 +1,92 @@
 import os
 import tempfile
-from langchain_community.embeddings import OllamaEmbeddings
+import numpy as np
+from langchain.embeddings.base import Embeddings
 from langchain.vectorstores import FAISS
 from langchain.text_splitter import CharacterTextSplitter
 from langchain.schema import Document
+from disk_cache import CACHE_DIR, DiskCache, hash_key
+from embedding_backends import get_embedding_backend
+from metrics import incr, span
+
+# === Persistent Chunk-Embedding Cache ===
+# Keyed by (embedding model, chunk text hash); LRU-evicted past RESUME_EMBEDDING_CACHE_MB
+embedding_cache = DiskCache(
+    os.path.join(CACHE_DIR, "embeddings"),
+    max_bytes=int(os.environ.get("RESUME_EMBEDDING_CACHE_MB", "512")) * 1024 * 1024,
+    suffix=".f32",
+)
+
+def load_cached_embedding(model_name, text):
+    data = embedding_cache.get(hash_key(model_name, text))
+    if data is None:
+        return None
+    return np.frombuffer(data, dtype=np.float32).tolist()
+
+def store_cached_embedding(model_name, text, vector):
+    embedding_cache.set(hash_key(model_name, text), np.asarray(vector, dtype=np.float32).tobytes())
+
+def embedding_cache_stats():
+    return embedding_cache.stats()
+
+# === Batched, cached embedding of many texts at once ===
+def _embed_batches(texts, backend):
+    batches = [texts[i:i + backend.batch_size] for i in range(0, len(texts), backend.batch_size)]
+    incr("embed_batches", len(batches))
+    return np.concatenate([backend.embed(batch) for batch in batches])
+
+def embed_texts(texts, backend):
+    # float32 (len(texts), dim); only cache misses reach the backend, in batch_size slices
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    incr("embed_chunks", len(texts))
+    if not backend.cacheable:
+        with span("embed.documents"):
+            return _embed_batches(texts, backend)
+
+    vectors = [load_cached_embedding(backend.cache_key, text) for text in texts]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    incr("embed_cache_hits", len(texts) - len(missing))
+    if missing:
+        with span("embed.documents"):
+            fresh = _embed_batches([texts[i] for i in missing], backend)
+        for i, vector in zip(missing, fresh):
+            store_cached_embedding(backend.cache_key, texts[i], vector)
+            vectors[i] = vector
+    return np.asarray(vectors, dtype=np.float32)
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, model_name="mistral", backend=None):
+        self.model_name = model_name
+        self.backend = backend or get_embedding_backend(model_name=model_name)
+
+    def embed_documents(self, texts):
+        return embed_texts(texts, self.backend).tolist()
+
+    def embed_query(self, text):
+        return embed_texts([text], self.backend)[0].tolist()
+
+# === Resume Chunking ===
+CHUNK_SIZE = 1000
+
+def split_resume(resume_text, chunk_size=CHUNK_SIZE):
+    splitter = CharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_size // 10)
+    return splitter.split_documents([Document(page_content=resume_text)])
 
 # === Real-Time Resume Vector Indexing ===
-def create_resume_vector_index(resume_text, model_name="mistral"):
+def create_resume_vector_index(resume_text, model_name="mistral", backend=None, chunk_size=CHUNK_SIZE):
     try:
         # Step 1: Split resume text into chunks
-        splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        docs = splitter.split_documents([Document(page_content=resume_text)])
+        docs = split_resume(resume_text, chunk_size=chunk_size)
 
-        # Step 2: Generate Embeddings
-        embedding_model = OllamaEmbeddings(model=model_name)
-        vectorstore = FAISS.from_documents(docs, embedding_model)
+        # Step 2: Generate Embeddings (cached chunks skip the backend entirely)
+        embedding_model = CachedEmbeddings(model_name, backend=backend)
+        with span("vector_index.build"):
+            vectorstore = FAISS.from_documents(docs, embedding_model)
 
-        print("✅ Real-time vector store created successfully.")
+        stats = embedding_cache_stats()
+        print(f"✅ Real-time vector store created successfully. (embedding cache: {stats['hits']} hits, {stats['misses']} misses)")
         return vectorstore
 
     except Exception as e:
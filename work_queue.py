@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from metrics import span
+from scorer import score_resumes, shortlist_indices
+from dedup import find_duplicate_clusters
+
+# === Work Queue Settings ===
+LEASE_SECONDS = float(os.environ.get("RESUME_QUEUE_LEASE_SECONDS", "300"))
+LEASE_SIZE = int(os.environ.get("RESUME_QUEUE_LEASE_SIZE", "8"))
+MAX_ATTEMPTS = int(os.environ.get("RESUME_QUEUE_MAX_ATTEMPTS", "3"))
+RETRY_SECONDS = float(os.environ.get("RESUME_QUEUE_RETRY_SECONDS", "30"))  # pause before a failed generation is retried
+
+# Job states: "extract" -> "extracted" -> "feedback" -> "done", or "extracted" -> "done" (score-only),
+# or "failed" once a job runs out of attempts. Only "extract" and "feedback" jobs are leased.
+# Scoring happens once, over every extracted text, and folds near-duplicates as process_batch does,
+# so scores and the shortlist match it: other members of a shortlisted cluster wait as "duplicate"
+# and take their representative's feedback. One worker claims that step and scores outside any
+# write transaction, so other workers aren't locked out.
+LEASED_STATES = ("extract", "feedback")
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+# === SQLite-backed job table shared by every worker of one batch ===
+# One file per batch. Workers on other machines only need the same path on a shared
+# filesystem, so the default rollback journal is used: WAL needs shared memory between processes.
+class WorkQueue:
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Autocommit mode; _transaction() issues BEGIN IMMEDIATE so a lease is one atomic step
+            self._conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    text TEXT,
+                    score REAL,
+                    skills TEXT,
+                    stage TEXT,
+                    feedback TEXT,
+                    error TEXT,
+                    cluster INTEGER,
+                    updated REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_cluster ON jobs (cluster)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS claims (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # === Producer side ===
+    def configure(self, **settings):
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in settings.items()],
+            )
+
+    def settings(self):
+        with self._lock:
+            rows = self._connection().execute("SELECT key, value FROM settings").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def enqueue(self, paths):
+        # Re-running the producer only adds files that aren't queued yet
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (path, state, updated) VALUES (?, 'extract', ?)",
+                [(path, now) for path in paths],
+            )
+            return conn.total_changes - before
+
+    # === Worker side ===
+    def lease(self, owner, limit=LEASE_SIZE, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        # Returns (state, [(id, path, text), ...]) for up to `limit` jobs of one state, or (None, []);
+        # text is None for extract jobs.
+        # Jobs whose lease expired (the worker died or stalled) are leased again until max_attempts.
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', lease_owner = NULL, lease_expires = NULL, updated = ?, "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE state IN (?, ?) AND attempts >= ? AND (lease_expires IS NULL OR lease_expires < ?)",
+                (now, *LEASED_STATES, max_attempts, now),
+            )
+            # Duplicates can't get feedback once their representative has failed
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', updated = ?, error = (SELECT r.error FROM jobs r WHERE r.id = jobs.cluster) "
+                "WHERE state = 'duplicate' AND cluster IN (SELECT id FROM jobs WHERE state = 'failed')",
+                (now,),
+            )
+            promote = self._claim_promotion(conn, owner, now, lease_seconds)
+            if not promote:
+                for state in LEASED_STATES:
+                    rows = conn.execute(
+                        "SELECT id, path, text FROM jobs WHERE state = ? AND (lease_expires IS NULL OR lease_expires < ?) "
+                        "ORDER BY id LIMIT ?",
+                        (state, now, limit),
+                    ).fetchall()
+                    if rows:
+                        conn.executemany(
+                            "UPDATE jobs SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+                            [(owner, now + lease_seconds, now, job_id) for job_id, _, _ in rows],
+                        )
+                        return state, rows
+        if promote:
+            self._promote_shortlist(owner)
+            return self.lease(owner, limit, lease_seconds, max_attempts)
+        return None, []
+
+    def _claim_promotion(self, conn, owner, now, lease_seconds):
+        # Once every resume is extracted, one worker claims the scoring pass; the claim expires
+        # like a lease, so another worker takes over if the claimant dies mid-scoring
+        if conn.execute("SELECT 1 FROM jobs WHERE state = 'extract' LIMIT 1").fetchone():
+            return False
+        if not conn.execute("SELECT 1 FROM jobs WHERE state = 'extracted' LIMIT 1").fetchone():
+            return False
+        if conn.execute("SELECT 1 FROM claims WHERE name = 'promotion' AND expires >= ?", (now,)).fetchone():
+            return False
+        conn.execute(
+            "INSERT OR REPLACE INTO claims (name, owner, expires) VALUES ('promotion', ?, ?)", (owner, now + lease_seconds)
+        )
+        return True
+
+    def _promote_shortlist(self, owner):
+        # Score every extracted resume against one shared vocabulary and pick the feedback
+        # shortlist, exactly as process_batch does. Reading and scoring hold no write lock.
+        with self._lock:
+            conn = self._connection()
+            extracted = conn.execute("SELECT id, text FROM jobs WHERE state = 'extracted' ORDER BY id").fetchall()
+            settings = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM settings")}
+        texts = [text for _, text in extracted]
+        if settings.get("dedup_threshold"):
+            with span("queue.dedup"):
+                representatives = find_duplicate_clusters(texts, threshold=settings["dedup_threshold"])
+        else:
+            representatives = list(range(len(texts)))
+        unique = sorted(set(representatives))
+        rep_pos = {r: k for k, r in enumerate(unique)}
+        sizes = Counter(representatives)
+        with span("queue.score"):
+            scores, matched_skills = score_resumes([texts[r] for r in unique], settings["jd_text"])
+        # top-K counts clusters, as in process_batch
+        shortlisted = {unique[k] for k in shortlist_indices(scores, top_k=settings.get("top_k"), min_score=settings.get("min_score"))}
+
+        def update(k, job_id, text):
+            r = representatives[k]
+            cluster = extracted[r][0] if sizes[r] > 1 else None
+            score, skills = float(scores[rep_pos[r]]), json.dumps(matched_skills[rep_pos[r]])
+            # Only representatives still need their text
+            if r not in shortlisted:
+                return ("done", "score-only", score, skills, None, cluster, now, job_id)
+            if r == k:
+                return ("feedback", None, score, skills, text, cluster, now, job_id)
+            return ("duplicate", None, score, skills, None, cluster, now, job_id)
+
+        now = time.time()
+        with self._transaction() as conn:
+            # A claim that expired and was taken over, or resumes queued meanwhile, void this pass
+            claimed = conn.execute("SELECT 1 FROM claims WHERE name = 'promotion' AND owner = ?", (owner,)).fetchone()
+            if claimed and not conn.execute("SELECT 1 FROM jobs WHERE state = 'extract' LIMIT 1").fetchone():
+                conn.executemany(
+                    "UPDATE jobs SET state = ?, stage = ?, score = ?, skills = ?, text = ?, cluster = ?, attempts = 0, updated = ? "
+                    "WHERE id = ? AND state = 'extracted'",
+                    [update(k, job_id, text) for k, (job_id, text) in enumerate(extracted)],
+                )
+            conn.execute("DELETE FROM claims WHERE name = 'promotion' AND owner = ?", (owner,))
+
+    def renew(self, owner, lease_seconds=LEASE_SECONDS):
+        # Long feedback chunks extend their lease as each resume finishes
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE lease_owner = ? AND state IN (?, ?)",
+                (time.time() + lease_seconds, owner, *LEASED_STATES),
+            )
+
+    def complete_extract(self, owner, job_id, text):
+        with self._transaction() as conn:
+            return self._finish(conn, owner, job_id, "extract", "state = 'extracted', text = ?", (text,))
+
+    def complete_feedback(self, owner, job_id, feedback):
+        with self._transaction() as conn:
+            finished = self._finish(
+                conn, owner, job_id, "feedback", "state = 'done', stage = 'feedback', feedback = ?, text = NULL", (feedback,)
+            )
+            if finished:
+                # Its near-duplicates share the feedback
+                conn.execute(
+                    "UPDATE jobs SET state = 'done', stage = 'feedback', feedback = ?, updated = ? WHERE cluster = ? AND state = 'duplicate'",
+                    (feedback, time.time(), job_id),
+                )
+            return finished
+
+    def fail(self, owner, job_id, error):
+        # Permanent failure (e.g. no extractable text); retrying would not help
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND lease_owner = ? AND state IN (?, ?)",
+                (str(error), time.time(), job_id, owner, *LEASED_STATES),
+            )
+
+    def release(self, owner, job_ids, error, retry_after=0):
+        # Transient failure: hand the jobs back for another attempt, no sooner than retry_after seconds
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET error = ?, lease_owner = NULL, lease_expires = ?, updated = ? "
+                "WHERE id = ? AND lease_owner = ? AND state IN (?, ?)",
+                [(str(error), now + retry_after if retry_after else None, now, job_id, owner, *LEASED_STATES) for job_id in job_ids],
+            )
+
+    def _finish(self, conn, owner, job_id, state, assignments, values):
+        # A worker whose lease was taken over no longer owns the job; its late result is dropped
+        cursor = conn.execute(
+            f"UPDATE jobs SET {assignments}, lease_owner = NULL, lease_expires = NULL, error = NULL, updated = ? "
+            "WHERE id = ? AND lease_owner = ? AND state = ?",
+            (*values, time.time(), job_id, owner, state),
+        )
+        return cursor.rowcount == 1
+
+    # === Progress and results ===
+    def counts(self):
+        with self._lock:
+            rows = self._connection().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return dict(rows)
+
+    def finished(self):
+        counts = self.counts()
+        return not any(counts.get(state) for state in ("extract", "extracted", "feedback", "duplicate"))
+
+    def results(self):
+        # (path, score, skills, stage, feedback, cluster) for every finished job; cluster is the
+        # representative's path for near-duplicates (the representative included), else None
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT j.path, j.score, j.skills, j.stage, j.feedback, r.path FROM jobs j "
+                "LEFT JOIN jobs r ON r.id = j.cluster WHERE j.state = 'done' ORDER BY j.id"
+            ).fetchall()
+        return [
+            (path, score, json.loads(skills or "[]"), stage, feedback or "", cluster)
+            for path, score, skills, stage, feedback, cluster in rows
+        ]
+
+    def failures(self):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT path, error FROM jobs WHERE state = 'failed' ORDER BY id"
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None